@@ -0,0 +1,118 @@
+"""
+SQLite persistence for scan results.
+"""
+import os
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
+
+import aiosqlite
+import orjson
+
+DB_PATH = os.getenv(
+    "DATABASE_PATH",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "geoscore.db")
+)
+
+_UPSERT_SQL = """
+    INSERT OR REPLACE INTO scans
+        (scan_id, brand_name, url, score, score_breakdown, timestamp, metadata)
+    VALUES (?, ?, ?, ?, ?, ?, ?)
+"""
+
+
+async def setup_db() -> None:
+    """Create the data directory and scans table if they do not exist."""
+    os.makedirs(os.path.dirname(DB_PATH) or ".", exist_ok=True)
+    async with aiosqlite.connect(DB_PATH) as db:
+        await db.execute(
+            """
+            CREATE TABLE IF NOT EXISTS scans (
+                scan_id TEXT PRIMARY KEY,
+                brand_name TEXT NOT NULL,
+                url TEXT,
+                score INTEGER NOT NULL,
+                score_breakdown TEXT NOT NULL,
+                timestamp TEXT NOT NULL,
+                metadata TEXT
+            )
+            """
+        )
+        await db.execute(
+            "CREATE INDEX IF NOT EXISTS idx_scans_timestamp ON scans (timestamp)"
+        )
+        await db.commit()
+
+
+def _to_row(scan_data: Dict[str, Any]) -> Tuple[Any, ...]:
+    """Flatten a scan dict into a scans table row."""
+    return (
+        scan_data['scan_id'],
+        scan_data['brand_name'],
+        scan_data.get('url'),
+        scan_data['score'],
+        orjson.dumps(scan_data['score_breakdown']).decode(),
+        scan_data['timestamp'],
+        orjson.dumps(scan_data.get('metadata') or {}).decode(),
+    )
+
+
+def _from_row(row: aiosqlite.Row) -> Dict[str, Any]:
+    """Rebuild a scan dict from a scans table row."""
+    scan = dict(row)
+    scan['score_breakdown'] = orjson.loads(scan['score_breakdown'])
+    scan['metadata'] = orjson.loads(scan['metadata']) if scan['metadata'] else {}
+    return scan
+
+
+async def save_scan(scan_data: Dict[str, Any]) -> None:
+    """
+    Insert or replace a single scan result.
+
+    Args:
+        scan_data: Scan fields (scan_id, brand_name, url, score,
+            score_breakdown, timestamp, metadata)
+    """
+    async with aiosqlite.connect(DB_PATH) as db:
+        await db.execute(_UPSERT_SQL, _to_row(scan_data))
+        await db.commit()
+
+
+async def save_scans_batch(scans: List[Dict[str, Any]]) -> None:
+    """
+    Insert or replace several scan results in a single transaction.
+
+    Args:
+        scans: Scan dicts in the same shape accepted by save_scan
+    """
+    if not scans:
+        return
+    async with aiosqlite.connect(DB_PATH) as db:
+        await db.executemany(_UPSERT_SQL, [_to_row(scan) for scan in scans])
+        await db.commit()
+
+
+async def get_scan(scan_id: str) -> Optional[Dict[str, Any]]:
+    """Retrieve a scan by its ID, or None if it does not exist."""
+    async with aiosqlite.connect(DB_PATH) as db:
+        db.row_factory = aiosqlite.Row
+        async with db.execute("SELECT * FROM scans WHERE scan_id = ?", (scan_id,)) as cursor:
+            row = await cursor.fetchone()
+    return _from_row(row) if row else None
+
+
+async def iter_scans_ndjson(limit: int = 10) -> AsyncIterator[bytes]:
+    """
+    Stream the most recent scans, newest first, as NDJSON lines.
+
+    Rows are read from the cursor one at a time and the stored JSON columns
+    are embedded as-is rather than decoded and re-encoded.
+    """
+    async with aiosqlite.connect(DB_PATH) as db:
+        db.row_factory = aiosqlite.Row
+        async with db.execute(
+            "SELECT * FROM scans ORDER BY timestamp DESC LIMIT ?", (limit,)
+        ) as cursor:
+            async for row in cursor:
+                scan = dict(row)
+                scan['score_breakdown'] = orjson.Fragment(scan['score_breakdown'])
+                scan['metadata'] = orjson.Fragment(scan['metadata'] or '{}')
+                yield orjson.dumps(scan) + b"\n"
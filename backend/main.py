@@ -4,20 +4,24 @@ GeoScore - A FastAPI service for scoring geographical entities.
 """
 import os
 import sys
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from typing import List, Dict, Any, Optional
+from typing import AsyncIterator, List, Dict, Any, Optional, Union
 
 import uvicorn
 from fastapi import FastAPI, HTTPException, status, Query
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.middleware.gzip import GZipMiddleware
+from fastapi.responses import JSONResponse, ORJSONResponse, StreamingResponse
 from pydantic import ValidationError
-from datetime import datetime
+from datetime import datetime, timezone
 
-# Use relative imports
-from .models.schemas import ScoreRequest, ScoreResponse
-from .services.scorer import Scorer
-from .data.db_utils import save_scan, get_scan, get_all_scans
+# Use absolute imports from the package root, matching the services and utils
+# modules, so each module is loaded once under a single name
+from models.schemas import ScoreRequest, ScoreResponse, ScoreError
+from services.scorer import Scorer
+from data.db_utils import setup_db, get_scan, iter_scans_ndjson
 
 # Initialize FastAPI app
 app = FastAPI(
@@ -25,7 +29,8 @@ app = FastAPI(
     description="API for scoring geographical entities based on various factors",
     version="1.0.0",
     docs_url="/docs",
-    redoc_url="/redoc"
+    redoc_url="/redoc",
+    default_response_class=ORJSONResponse
 )
 
 # Enable CORS
@@ -37,24 +42,59 @@ app.add_middleware(
         "http://localhost:8000",        # Local backend
     ],
     allow_credentials=True,
-    allow_methods=["*"],
-    allow_headers=["*"],
+    allow_methods=["GET", "POST", "OPTIONS"],
+    allow_headers=["Content-Type", "Authorization"],
+    max_age=86400,  # Let browsers cache preflight responses for a day
 )
 
+# Compress JSON payloads (scan metadata, history) larger than 512 bytes
+app.add_middleware(GZipMiddleware, minimum_size=512, compresslevel=5)
+
 # Initialize the scorer
 scorer = Scorer()
 
+# Batch scoring limits: brands per request and brands scored at once
+MAX_BATCH_SIZE = 100
+BATCH_CONCURRENCY = 16
+
+# (breakdown key, threshold, suggestion) for components scoring below threshold
+SUGGESTION_RULES = (
+    ("wikipedia_presence", 50, "Consider creating or improving your Wikipedia page."),
+    ("llm_recall", 50, "Improve your online mentions and media coverage for better LLM recall."),
+    ("platform_visibility", 50, "Strengthen your LinkedIn and developer profiles."),
+    ("web_presence", 50, "Increase website SEO and digital PR efforts."),
+)
+
 @app.on_event("startup")
 async def startup_event():
     """Initialize database on startup."""
-    from .data.db_utils import setup_db
+    # Worker threads for HTML parsing offloaded by the checks
+    asyncio.get_running_loop().set_default_executor(
+        ThreadPoolExecutor(max_workers=(os.cpu_count() or 1) * 2)
+    )
     await setup_db()
     print("Database initialized")
+    scorer.warm_up()
+    # Purge Wikipedia results published on the invalidation channel
+    app.state.wiki_invalidation = asyncio.create_task(
+        scorer.wiki_checker.listen_for_invalidations()
+    )
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    """Close shared HTTP and OpenAI connections on shutdown."""
+    app.state.wiki_invalidation.cancel()
+    await scorer.aclose()
 
 @app.get("/health", status_code=status.HTTP_200_OK)
 async def health_check() -> dict:
     """Health check endpoint."""
-    return {"status": "healthy", "timestamp": datetime.utcnow().isoformat()}
+    return {"status": "healthy", "timestamp": datetime.now(timezone.utc).isoformat(timespec="milliseconds")}
+
+@app.get("/meta/cache-stats")
+async def cache_stats() -> dict:
+    """Hit and miss counts for the Wikipedia result cache tiers in this worker."""
+    return {"wikipedia": scorer.wiki_checker.cache_stats}
 
 @app.post("/check-score", response_model=ScoreResponse, status_code=status.HTTP_200_OK)
 async def check_score(payload: ScoreRequest) -> ScoreResponse:
@@ -68,26 +108,12 @@ async def check_score(payload: ScoreRequest) -> ScoreResponse:
         ScoreResponse with the calculated score and breakdown
     """
     try:
-        # Calculate the score asynchronously
-        result = await scorer.calculate_score(
+        # Calculate the score asynchronously (the scorer persists the scan)
+        return await scorer.calculate_score(
             brand_name=payload.brand_name,
             url=payload.url
         )
         
-        # Save the scan result to the database
-        scan_data = {
-            'scan_id': result.scan_id,
-            'brand_name': payload.brand_name,
-            'url': payload.url,
-            'score': result.score,
-            'score_breakdown': result.score_breakdown.dict(),
-            'timestamp': result.timestamp,
-            'metadata': result.metadata
-        }
-        await save_scan(scan_data)
-        
-        return result
-        
     except ValidationError as e:
         raise HTTPException(
             status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
@@ -99,6 +125,61 @@ async def check_score(payload: ScoreRequest) -> ScoreResponse:
             detail=f"An error occurred while processing your request: {str(e)}"
         )
 
+@app.post(
+    "/check-score-batch",
+    response_model=List[Union[ScoreResponse, ScoreError]],
+    status_code=status.HTTP_200_OK
+)
+async def check_score_batch(payload: List[ScoreRequest]) -> List[Union[ScoreResponse, ScoreError]]:
+    """
+    Calculate GEO scores for several brands concurrently.
+    
+    Args:
+        payload: List of ScoreRequests, at most MAX_BATCH_SIZE items
+        
+    Returns:
+        One ScoreResponse per request, in order, or a ScoreError for items that failed
+    """
+    if len(payload) > MAX_BATCH_SIZE:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail=f"Batch size {len(payload)} exceeds the limit of {MAX_BATCH_SIZE}"
+        )
+    
+    # Look up every brand's Wikipedia page up front, up to 20 per request
+    wiki_results = await scorer.check_wikipedia_batch([item.brand_name for item in payload])
+    
+    semaphore = asyncio.Semaphore(BATCH_CONCURRENCY)
+    
+    async def score_one(
+        item: ScoreRequest, wiki_result: Optional[Dict[str, Any]]
+    ) -> Union[ScoreResponse, ScoreError]:
+        async with semaphore:
+            try:
+                return await scorer.calculate_score(
+                    brand_name=item.brand_name,
+                    url=item.url,
+                    store=False,
+                    wiki_result=wiki_result
+                )
+            except Exception as e:
+                return ScoreError(brand_name=item.brand_name, url=item.url, error=str(e))
+    
+    results = await asyncio.gather(
+        *(score_one(item, wiki_result) for item, wiki_result in zip(payload, wiki_results))
+    )
+    
+    # Persist all successful scans in one transaction
+    try:
+        await scorer.store_results([r for r in results if isinstance(r, ScoreResponse)])
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Error saving batch results: {str(e)}"
+        )
+    
+    return results
+
 @app.get("/results/{scan_id}", response_model=ScoreResponse)
 async def get_result(scan_id: str):
     """
@@ -110,7 +191,7 @@ async def get_result(scan_id: str):
     Returns:
         The stored ScoreResponse or 404 if not found
     """
-    result = await get_scan(scan_id)
+    result = await scorer.fetch_result(scan_id) or await get_scan(scan_id)
     if not result:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -118,7 +199,7 @@ async def get_result(scan_id: str):
         )
     return result
 
-@app.get("/history", response_model=List[Dict[str, Any]])
+@app.get("/history", response_class=StreamingResponse)
 async def get_history(limit: int = Query(10, ge=1, le=100, description="Number of results to return")):
     """
     Get scan history.
@@ -127,15 +208,26 @@ async def get_history(limit: int = Query(10, ge=1, le=100, description="Number o
         limit: Maximum number of results to return (1-100)
         
     Returns:
-        List of recent scan results
+        Recent scan results as newline-delimited JSON, newest first
     """
+    rows = iter_scans_ndjson(limit=limit)
     try:
-        return await get_all_scans(limit=limit)
+        # Connect, run the query and read the first row before any headers
+        # are sent, so database errors still become a 500
+        first = await anext(rows, None)
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Error retrieving scan history: {str(e)}"
         )
+    
+    async def body() -> AsyncIterator[bytes]:
+        if first is not None:
+            yield first
+            async for line in rows:
+                yield line
+    
+    return StreamingResponse(body(), media_type="application/x-ndjson")
 
 @app.get("/suggestions/{scan_id}", response_model=Dict[str, Any])
 async def get_suggestions(scan_id: str):
@@ -150,7 +242,7 @@ async def get_suggestions(scan_id: str):
     """
     try:
         # Get the scan result
-        scan = await get_scan(scan_id)
+        scan = await scorer.fetch_result(scan_id) or await get_scan(scan_id)
         if not scan:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
@@ -159,19 +251,10 @@ async def get_suggestions(scan_id: str):
         
         # Generate suggestions based on the score breakdown
         breakdown = scan.get('score_breakdown', {})
-        suggestions = []
-        
-        if breakdown.get('wikipedia_presence', 0) < 50:
-            suggestions.append("Consider creating or improving your Wikipedia page.")
-        
-        if breakdown.get('llm_recall', 0) < 50:
-            suggestions.append("Improve your online mentions and media coverage for better LLM recall.")
-        
-        if breakdown.get('platform_visibility', 0) < 50:
-            suggestions.append("Strengthen your LinkedIn and developer profiles.")
-        
-        if breakdown.get('web_presence', 0) < 50:
-            suggestions.append("Increase website SEO and digital PR efforts.")
+        suggestions = [
+            message for key, threshold, message in SUGGESTION_RULES
+            if breakdown.get(key, 0) < threshold
+        ]
         
         return {
             "scan_id": scan_id,
@@ -194,5 +277,6 @@ if __name__ == "__main__":
         "main:app",
         host="0.0.0.0",
         port=int(os.getenv("PORT", 8000)),
+        loop="uvloop",
         reload=True
     )
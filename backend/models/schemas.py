@@ -13,7 +13,7 @@ class GeoEntity(BaseModel):
     coordinates: Optional[tuple[float, float]] = None
     score: Optional[float] = None
     confidence: Optional[float] = None
-    metadata: Optional[Dict[str, Any]] = {}
+    metadata: Optional[Dict[str, Any]] = Field(default_factory=dict)
 
 
 class ScoreRequest(BaseModel):
@@ -34,7 +34,7 @@ class ScoreResponse(BaseModel):
     """Response model for the /check-score endpoint."""
     score: int = Field(..., ge=0, le=100, description="Overall GEO score (0-100)")
     score_breakdown: ScoreBreakdown = Field(..., description="Detailed score breakdown")
-    scan_id: str = Field(..., description="Unique identifier for this scan")
+    scan_id: str = Field(..., description="Unique, time-ordered identifier for this scan (32 hex characters)")
     timestamp: str = Field(..., description="ISO 8601 timestamp of when the scan was performed")
     metadata: Optional[Dict[str, Any]] = Field(
         default_factory=dict,
@@ -42,10 +42,17 @@ class ScoreResponse(BaseModel):
     )
 
 
+class ScoreError(BaseModel):
+    """Per-item error returned by the /check-score-batch endpoint."""
+    brand_name: str = Field(..., description="The brand that could not be scored")
+    url: str = Field(..., description="The URL submitted with the brand")
+    error: str = Field(..., description="Why scoring failed")
+
+
 class ScoringResult(BaseModel):
     """Represents the result of a scoring operation."""
     entity: str
     score: float
     confidence: float
-    details: Optional[Dict[str, Any]] = {}
+    details: Optional[Dict[str, Any]] = Field(default_factory=dict)
     timestamp: Optional[str] = None
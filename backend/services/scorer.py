@@ -2,26 +2,99 @@
 Scoring service for geographical entities.
 """
 import json
-import uuid
+import logging
+import os
+import time
 import asyncio
-from datetime import datetime
+from collections import OrderedDict
+from datetime import datetime, timezone
 from typing import Dict, Any, Optional, List, Tuple
 
+import httpx
+import numpy as np
+import orjson
+
 # Use absolute imports from the package root
-from data.db_utils import save_scan
+from data.db_utils import save_scan, save_scans_batch
 from models.schemas import GeoEntity, ScoreRequest, ScoreResponse, ScoreBreakdown
-from utils.wiki_check import WikipediaChecker
-from utils.llm_check import LLMChecker
+from services.scorer_kernels import weighted_scores
+from utils.wiki_check import close_wiki_client, get_checker
+from utils.llm_check import LLMChecker, close_openai_client
+from utils.redis_client import close_redis, get_redis
 from utils.linkedin_check import check_linkedin_presence
 from utils.web_presence import check_web_presence
 
+logger = logging.getLogger(__name__)
+
+# Seconds scan results stay readable from Redis by any worker
+RESULT_TTL = 86400
+
+# Shared HTTP client so connections to the search hosts are reused across scans.
+# The transport retries failed connection attempts before a check gives up. There
+# is no HTTP cache: the search pages are private, max-age=0 without validators,
+# and the Custom Search URL carries the API key; results are cached per brand instead.
+http_client = httpx.AsyncClient(
+    transport=httpx.AsyncHTTPTransport(
+        http2=True,
+        limits=httpx.Limits(max_connections=100, max_keepalive_connections=50, keepalive_expiry=30),
+        retries=3,
+    ),
+    timeout=10.0,
+    follow_redirects=True,
+)
+
+# Opt-in: skip the LLM check once LinkedIn and web presence average at least this score
+LLM_SKIP_THRESHOLD: Optional[float] = (
+    float(os.environ["LLM_SKIP_THRESHOLD"]) if os.getenv("LLM_SKIP_THRESHOLD") else None
+)
+
+def new_scan_id() -> str:
+    """
+    Generate a time-ordered scan ID.
+    
+    48 bits of millisecond timestamp followed by 80 random bits, as 32 hex
+    characters, so IDs sort by creation time and append to the scans index.
+    """
+    return f"{time.time_ns() // 1_000_000:012x}{os.urandom(10).hex()}"
+
 class Scorer:
     """Handles scoring of geographical entities."""
     
-    def __init__(self):
-        self.wiki_checker = WikipediaChecker()
+    def __init__(
+        self,
+        cache_ttl: float = 3600,
+        cache_size: int = 1024,
+        results_size: int = 1024,
+        llm_skip_threshold: Optional[float] = LLM_SKIP_THRESHOLD,
+        llm_skip_wait: float = 2.0
+    ):
+        """
+        Initialize the scorer.
+        
+        Args:
+            cache_ttl: Seconds a score is reused for repeat (brand, url) requests
+            cache_size: Maximum number of cached scores
+            results_size: Maximum number of recent scan results kept in memory
+            llm_skip_threshold: Cancel the LLM check when the LinkedIn and web
+                scores average at least this; None always waits for the LLM
+            llm_skip_wait: Seconds to wait for the LinkedIn and web checks
+                before giving up on skipping the LLM
+        """
+        self.llm_skip_threshold = llm_skip_threshold
+        self.llm_skip_wait = llm_skip_wait
+        self.wiki_checker = get_checker()
         self.llm_checker = LLMChecker()
-        self.results: Dict[str, Any] = {}
+        
+        # Recently stored scan records by scan ID, least recently used first
+        self.results_size = results_size
+        self.results: OrderedDict[str, Dict[str, Any]] = OrderedDict()
+        # Shared with other workers through Redis when REDIS_URL is configured
+        self._redis = get_redis()
+        
+        # Recent scores keyed on (brand, url), oldest first
+        self.cache_ttl = cache_ttl
+        self.cache_size = cache_size
+        self._score_cache: OrderedDict[Tuple[str, str], Tuple[float, ScoreResponse]] = OrderedDict()
         
         # Define weights for each scoring component
         self.weights = {
@@ -30,45 +103,161 @@ class Scorer:
             'linkedin': 0.2,   # 20% weight
             'web': 0.2         # 20% weight
         }
+        # Same weights as a vector, ordered wikipedia, llm, linkedin, web
+        self._weights_vec = np.array(list(self.weights.values()), dtype=np.float64)
     
-    async def calculate_score(self, brand_name: str, url: str) -> ScoreResponse:
+    async def calculate_score(
+        self,
+        brand_name: str,
+        url: str,
+        store: bool = True,
+        wiki_result: Optional[Dict[str, Any]] = None
+    ) -> ScoreResponse:
         """
         Calculate a GEO score for the given brand using weighted scoring.
         
         Args:
             brand_name: Name of the brand to score
             url: URL of the brand's website
+            store: Persist the result; pass False to batch writes via store_results
+            wiki_result: Wikipedia result already looked up for the brand, e.g.
+                by check_wikipedia_batch; checked here if not given
             
         Returns:
             ScoreResponse: The scoring result with weighted score
         """
+        # Serve repeat requests from the cache with a fresh scan ID
+        cache_key = (brand_name.lower(), url)
+        cached = self._get_cached_score(cache_key)
+        if cached is not None:
+            response = cached.model_copy(update={
+                'scan_id': new_scan_id(),
+                'timestamp': datetime.now(timezone.utc).isoformat(timespec="milliseconds"),
+                # The cache key ignores case, so record this caller's spelling
+                'metadata': {
+                    **cached.metadata,
+                    'entity': {**cached.metadata['entity'], 'name': brand_name},
+                    'cache_hit': True
+                }
+            })
+            if store:
+                await self._store_result(response)
+            return response
+        
         # Create a GeoEntity
         entity = GeoEntity(name=brand_name, location=None, metadata={'url': url})
         
         # Run all checks in parallel
-        wiki_task = asyncio.create_task(self._check_wikipedia(entity))
+        tasks = {}
+        if wiki_result is None:
+            tasks['wikipedia'] = asyncio.create_task(self._check_wikipedia(entity))
         llm_task = asyncio.create_task(self.llm_checker.verify_entity(entity))
+        linkedin_task = asyncio.create_task(check_linkedin_presence(brand_name, http_client))
+        web_task = asyncio.create_task(check_web_presence(brand_name, http_client))
         
-        # Run synchronous checks in thread pool
-        loop = asyncio.get_running_loop()
-        linkedin_task = loop.run_in_executor(None, check_linkedin_presence, brand_name)
-        web_task = loop.run_in_executor(None, check_web_presence, brand_name)
+        # Skip the slow LLM call when the cheap checks are already decisive
+        llm_result = None
+        if self.llm_skip_threshold is not None:
+            llm_result = await self._try_skip_llm(llm_task, linkedin_task, web_task)
         
-        # Wait for all tasks to complete
-        wiki_result, llm_result, linkedin_result, web_result = await asyncio.gather(
-            wiki_task, llm_task, linkedin_task, web_task
+        # Wait for all tasks to complete; a check that raises scores 0 with
+        # its error rather than failing the whole scan
+        tasks.update({'linkedin': linkedin_task, 'web': web_task})
+        if llm_result is None:
+            tasks['llm'] = llm_task
+        outcomes = await asyncio.gather(*tasks.values(), return_exceptions=True)
+        results = {
+            name: self._check_outcome(name, outcome) for name, outcome in zip(tasks, outcomes)
+        }
+        if llm_result is not None:
+            results['llm'] = llm_result
+        if wiki_result is not None:
+            results['wikipedia'] = wiki_result
+        response = self._build_response(
+            entity, results['wikipedia'], results['llm'], results['linkedin'], results['web']
         )
         
+        # Only reuse scores where every check completed without an error and
+        # the LLM check actually ran; a skipped one was only estimated
+        if llm_result is None and not any('error' in r.get('details', {}) for r in results.values()):
+            self._cache_score(cache_key, response)
+        
+        # Store the result
+        if store:
+            await self._store_result(response)
+        
+        return response
+    
+    @staticmethod
+    def _check_outcome(name: str, outcome: Any) -> Dict[str, Any]:
+        """Return a check's result, or a zero-score error result if it raised."""
+        if not isinstance(outcome, BaseException):
+            return outcome
+        logger.error(f"{name} check failed: {str(outcome)}")
+        return {
+            'score': 0,
+            'details': {
+                'error': str(outcome),
+                'confidence': 'low',
+                'message': f'Error running {name} check'
+            }
+        }
+    
+    async def _try_skip_llm(
+        self,
+        llm_task: asyncio.Task,
+        linkedin_task: asyncio.Task,
+        web_task: asyncio.Task
+    ) -> Optional[Dict[str, Any]]:
+        """
+        Cancel the LLM check if the LinkedIn and web checks finish quickly with
+        a high enough average score.
+        
+        Returns:
+            The stand-in LLM result, estimated from the cheap checks, or None
+            if the LLM check should be awaited as usual
+        """
+        await asyncio.wait((linkedin_task, web_task), timeout=self.llm_skip_wait)
+        if llm_task.done() or not (linkedin_task.done() and web_task.done()):
+            return None
+        if linkedin_task.exception() or web_task.exception():
+            return None
+        
+        estimate = (linkedin_task.result()['score'] + web_task.result()['score']) / 2
+        if estimate < self.llm_skip_threshold:
+            return None
+        
+        llm_task.cancel()
+        return {
+            'score': int(estimate),
+            'confidence': 0.0,
+            'details': {
+                'method': 'llm_skipped',
+                'confidence': 'low',
+                'message': 'Estimated from LinkedIn and web presence scores'
+            }
+        }
+    
+    def _build_response(
+        self,
+        entity: GeoEntity,
+        wiki_result: Dict[str, Any],
+        llm_result: Dict[str, Any],
+        linkedin_result: Dict[str, Any],
+        web_result: Dict[str, Any]
+    ) -> ScoreResponse:
+        """Combine the individual check results into a weighted ScoreResponse."""
         # Calculate weighted score
-        weighted_score = int(
-            wiki_result['score'] * self.weights['wikipedia'] +
-            llm_result['score'] * self.weights['llm'] +
-            linkedin_result['score'] * self.weights['linkedin'] +
-            web_result['score'] * self.weights['web']
-        )
+        scores = np.array([[
+            wiki_result['score'],
+            llm_result['score'],
+            linkedin_result['score'],
+            web_result['score']
+        ]], dtype=np.float64)
+        weighted_score = int(weighted_scores(scores, self._weights_vec)[0])
         
         # Create response with weighted score
-        response = ScoreResponse(
+        return ScoreResponse(
             score=weighted_score,
             score_breakdown=ScoreBreakdown(
                 llm_recall=llm_result['score'],
@@ -76,8 +265,8 @@ class Scorer:
                 platform_visibility=linkedin_result['score'],
                 web_presence=web_result['score']
             ),
-            scan_id=str(uuid.uuid4()),
-            timestamp=datetime.utcnow().isoformat(),
+            scan_id=new_scan_id(),
+            timestamp=datetime.now(timezone.utc).isoformat(timespec="milliseconds"),
             metadata={
                 'checks': {
                     'wikipedia': wiki_result['details'],
@@ -85,20 +274,55 @@ class Scorer:
                     'linkedin': linkedin_result['details'],
                     'web': web_result['details']
                 },
-                'entity': entity.dict(),
-                'weights': self.weights  # Include weights in metadata for reference
+                'entity': entity.model_dump(mode="json"),
+                'weights': self.weights,  # Include weights in metadata for reference
+                'cache_hit': False
             }
         )
+    
+    async def aclose(self) -> None:
+        """Close the shared HTTP, OpenAI and Redis clients."""
+        await http_client.aclose()
+        await close_wiki_client()
+        await close_openai_client()
+        await close_redis()
+    
+    def warm_up(self) -> None:
+        """
+        Run the aggregation and serialization path once with stubbed check
+        results, so the first request doesn't pay for kernel compilation or
+        first-use setup. Makes no network calls and stores nothing.
+        """
+        stub = {'score': 0, 'details': {'method': 'warm_up'}}
+        entity = GeoEntity(name='__warmup__', location=None, metadata={'url': 'http://localhost'})
+        response = self._build_response(entity, stub, stub, stub, stub)
+        orjson.dumps(self._scan_record(response))
+    
+    def _get_cached_score(self, key: Tuple[str, str]) -> Optional[ScoreResponse]:
+        """Return the cached response for key, or None if missing or expired."""
+        entry = self._score_cache.get(key)
+        if entry is None:
+            return None
         
-        # Store the result
-        self._store_result(response)
+        cached_at, response = entry
+        if time.monotonic() - cached_at > self.cache_ttl:
+            del self._score_cache[key]
+            return None
         
+        self._score_cache.move_to_end(key)
         return response
     
+    def _cache_score(self, key: Tuple[str, str], response: ScoreResponse) -> None:
+        """Cache a response, evicting the least recently used entries over the limit."""
+        self._score_cache[key] = (time.monotonic(), response)
+        self._score_cache.move_to_end(key)
+        while len(self._score_cache) > self.cache_size:
+            self._score_cache.popitem(last=False)
+    
     async def _check_wikipedia(self, entity: GeoEntity) -> Dict[str, Any]:
         """Check Wikipedia presence with error handling."""
         try:
-            return self.wiki_checker.check_entity(entity.name)
+            return (await self.wiki_checker.check_entity(entity.name)).to_dict()
         except Exception as e:
             return {
                 'score': 0,
@@ -110,6 +334,30 @@ class Scorer:
                 }
             }
     
+    async def check_wikipedia_batch(self, brand_names: List[str]) -> List[Optional[Dict[str, Any]]]:
+        """
+        Look up several brands' Wikipedia pages with multi-title queries.
+        
+        Returns one result per brand, in order, for calculate_score's
+        wiki_result; all None if the batch lookup failed outright, so each
+        brand is then checked on its own.
+        """
+        try:
+            results = await self.wiki_checker.check_entities_batch(brand_names)
+        except Exception as e:
+            logger.error(f"Batch Wikipedia lookup failed: {str(e)}")
+            return [None] * len(brand_names)
+        return [result.to_dict() for result in results]
+    
+    def _scan_record(self, result: ScoreResponse) -> Dict[str, Any]:
+        """Build the database record for a scan result."""
+        # One dump of the whole response covers the breakdown and metadata
+        record = result.model_dump(mode="json")
+        entity = record['metadata']['entity']
+        record['brand_name'] = entity['name']
+        record['url'] = entity['metadata'].get('url')
+        return record
+    
     async def _store_result(self, result: ScoreResponse) -> None:
         """
         Store the scan result in the database.
@@ -117,21 +365,73 @@ class Scorer:
         Args:
             result: The ScoreResponse to store
         """
-        scan_data = {
-            'scan_id': result.scan_id,
-            'brand_name': result.metadata['entity']['name'],
-            'url': result.metadata['entity']['metadata'].get('url'),
-            'score': result.score,
-            'score_breakdown': result.score_breakdown.dict(),
-            'timestamp': result.timestamp,
-            'metadata': result.metadata
-        }
-        await save_scan(scan_data)
+        record = self._scan_record(result)
+        await save_scan(record)
+        self._remember_result(record)
+        await self._share_results([record])
+    
+    async def store_results(self, results: List[ScoreResponse]) -> None:
+        """
+        Store several scan results in a single database transaction.
+        
+        Args:
+            results: The ScoreResponses to store
+        """
+        records = [self._scan_record(result) for result in results]
+        await save_scans_batch(records)
+        for record in records:
+            self._remember_result(record)
+        await self._share_results(records)
+    
+    def _remember_result(self, record: Dict[str, Any]) -> None:
+        """Keep a scan record in memory, evicting the least recently used over the limit."""
+        self.results[record['scan_id']] = record
+        self.results.move_to_end(record['scan_id'])
+        while len(self.results) > self.results_size:
+            self.results.popitem(last=False)
     
     def get_result(self, scan_id: str) -> Optional[Dict[str, Any]]:
-        """Retrieve a stored result by scan ID."""
-        return self.results.get(scan_id)
+        """Retrieve a recently stored result by scan ID; older scans live only in the database."""
+        record = self.results.get(scan_id)
+        if record is not None:
+            self.results.move_to_end(scan_id)
+        return record
+    
+    async def fetch_result(self, scan_id: str) -> Optional[Dict[str, Any]]:
+        """
+        Retrieve a recent result by scan ID from this worker's memory or, failing
+        that, from Redis, where every worker publishes its results.
+        
+        Returns:
+            The scan record, or None if only the database may still have it
+        """
+        record = self.get_result(scan_id)
+        if record is not None or self._redis is None:
+            return record
+        
+        try:
+            raw = await self._redis.get(f"scan:{scan_id}")
+        except Exception as e:
+            logger.warning(f"Redis read failed for scan {scan_id}: {str(e)}")
+            return None
+        if not raw:
+            return None
+        record = orjson.loads(raw)
+        self._remember_result(record)
+        return record
+    
+    async def _share_results(self, records: List[Dict[str, Any]]) -> None:
+        """Publish scan records to Redis for other workers, ignoring failures."""
+        if self._redis is None:
+            return
+        try:
+            async with self._redis.pipeline(transaction=False) as pipe:
+                for record in records:
+                    pipe.setex(f"scan:{record['scan_id']}", RESULT_TTL, orjson.dumps(record))
+                await pipe.execute()
+        except Exception as e:
+            logger.warning(f"Redis write failed for {len(records)} scan(s): {str(e)}")
     
     def get_all_results(self) -> Dict[str, Any]:
-        """Retrieve all stored results."""
+        """Retrieve all results held in memory."""
         return self.results
\ No newline at end of file
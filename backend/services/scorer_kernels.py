@@ -0,0 +1,34 @@
+"""
+Numeric kernels for score aggregation.
+
+Compiled with numba when it is installed; otherwise the same functions run
+as plain NumPy.
+"""
+import numpy as np
+
+try:
+    from numba import njit
+    _NUMBA_AVAILABLE = True
+except ImportError:  # pragma: no cover - depends on the environment
+    _NUMBA_AVAILABLE = False
+
+    def njit(*args, **kwargs):
+        """No-op stand-in for numba.njit."""
+        def decorator(func):
+            return func
+        return decorator
+
+
+@njit(cache=True, nogil=True)
+def weighted_scores(scores: np.ndarray, weights: np.ndarray) -> np.ndarray:
+    """
+    Weighted sum of component scores for a batch of brands.
+
+    Args:
+        scores: (n_brands, n_components) array of component scores
+        weights: (n_components,) array of component weights
+
+    Returns:
+        np.ndarray: (n_brands,) int32 weighted scores, truncated like int()
+    """
+    return (scores * weights).sum(axis=1).astype(np.int32)
@@ -24,23 +24,29 @@ setup(
         "Operating System :: OS Independent",
         "Intended Audience :: Developers",
     ],
-    python_requires=">=3.8",
+    python_requires=">=3.10",
     install_requires=[
-        "fastapi>=0.68.0",
+        "fastapi>=0.100.0",
         "uvicorn>=0.15.0",
-        "pydantic>=1.8.0",
+        "uvloop>=0.17.0; sys_platform != 'win32'",
+        "pydantic>=2.5.0",
         "python-dotenv>=0.19.0,<1.0.0",
-        "requests>=2.26.0,<3.0.0",
-        "beautifulsoup4>=4.9.3,<5.0.0",
-        "wikipedia-api>=0.5.4,<1.0.0",
-        "openai>=0.27.0,<1.0.0",
-        "google-api-python-client>=2.0.0,<3.0.0",
+        "selectolax>=0.3.17",
+        "openai>=1.30.0,<2.0.0",
         "python-multipart>=0.0.5,<1.0.0",
-        "fake-useragent>=1.1.3,<2.0.0",
         'aiosqlite>=0.18.0',
-        'httpx>=0.23.0',
+        'orjson>=3.9.0',
+        'numpy>=1.22.0',
+        'httpx[http2]>=0.23.0',
+        'tenacity>=8.2.0',
     ],
     extras_require={
+        "perf": [
+            "numba>=0.58.0",
+        ],
+        "redis": [
+            "redis>=5.0.1",
+        ],
         "dev": [
             "pytest>=6.2.5,<7.0.0",
             "pytest-cov>=2.12.0,<3.0.0",
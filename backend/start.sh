@@ -25,4 +25,5 @@ echo "Starting GeoScore API..."
 uvicorn main:app \
     --host ${HOST:-0.0.0.0} \
     --port ${PORT:-8000} \
+    --loop uvloop \
     --reload
@@ -0,0 +1,87 @@
+import pytest
+
+import main
+from models.schemas import ScoreBreakdown, ScoreResponse
+
+
+def _response(brand_name, score):
+    return ScoreResponse(
+        score=score,
+        score_breakdown=ScoreBreakdown(
+            llm_recall=score, wikipedia_presence=score, platform_visibility=score, web_presence=score
+        ),
+        scan_id=f"scan-{brand_name}",
+        timestamp="2024-01-01T00:00:00.000Z",
+        metadata={"entity": {"name": brand_name}},
+    )
+
+
+@pytest.fixture
+def stub_scorer(monkeypatch):
+    """Stub the scorer so batch requests make no network or database calls."""
+    calls = {"scored": [], "stored": []}
+
+    async def check_wikipedia_batch(brand_names):
+        return [{"score": 100, "details": {"title": name}} for name in brand_names]
+
+    async def calculate_score(brand_name, url, store=True, wiki_result=None):
+        calls["scored"].append((brand_name, store, wiki_result["details"]["title"]))
+        if brand_name == "Broken":
+            raise RuntimeError("upstream exploded")
+        return _response(brand_name, len(brand_name))
+
+    async def store_results(results):
+        calls["stored"].append([r.scan_id for r in results])
+
+    monkeypatch.setattr(main.scorer, "check_wikipedia_batch", check_wikipedia_batch)
+    monkeypatch.setattr(main.scorer, "calculate_score", calculate_score)
+    monkeypatch.setattr(main.scorer, "store_results", store_results)
+    return calls
+
+
+def _items(*names):
+    return [{"brand_name": name, "url": "https://example.com"} for name in names]
+
+
+def test_batch_over_limit_is_rejected(test_client, stub_scorer):
+    """More than MAX_BATCH_SIZE items is a 422 and nothing is scored."""
+    response = test_client.post(
+        "/check-score-batch", json=_items(*(f"B{i}" for i in range(main.MAX_BATCH_SIZE + 1)))
+    )
+
+    assert response.status_code == 422
+    assert stub_scorer["scored"] == []
+
+
+def test_batch_results_are_in_request_order(test_client, stub_scorer):
+    """Each item gets its own result, in the order submitted."""
+    names = ["Acme", "Globex", "Initech", "Umbrella"]
+    response = test_client.post("/check-score-batch", json=_items(*names))
+
+    assert response.status_code == 200
+    assert [r["metadata"]["entity"]["name"] for r in response.json()] == names
+    # Scans are not stored one by one, and use the prefetched Wikipedia results
+    assert all(store is False for _, store, _ in stub_scorer["scored"])
+    assert sorted(title for _, _, title in stub_scorer["scored"]) == sorted(names)
+
+
+def test_failing_item_returns_score_error(test_client, stub_scorer):
+    """An item that raises becomes a ScoreError without failing the batch."""
+    response = test_client.post("/check-score-batch", json=_items("Acme", "Broken", "Globex"))
+
+    body = response.json()
+    assert response.status_code == 200
+    assert body[1] == {
+        "brand_name": "Broken",
+        "url": "https://example.com",
+        "error": "upstream exploded",
+    }
+    assert body[0]["scan_id"] == "scan-Acme"
+    assert body[2]["scan_id"] == "scan-Globex"
+
+
+def test_successful_scans_are_stored_in_one_call(test_client, stub_scorer):
+    """All successful scans are persisted by a single store_results call."""
+    test_client.post("/check-score-batch", json=_items("Acme", "Broken", "Globex"))
+
+    assert stub_scorer["stored"] == [["scan-Acme", "scan-Globex"]]
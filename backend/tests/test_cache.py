@@ -0,0 +1,154 @@
+import asyncio
+from types import SimpleNamespace
+
+import httpx
+import pytest
+
+import utils.cache as cache_module
+from utils.cache import TTLCache, brand_ttl_cache
+from utils.linkedin_check import check_linkedin_presence
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    """Controllable monotonic clock for the cache module."""
+    now = [1000.0]
+    monkeypatch.setattr(cache_module, "time", SimpleNamespace(monotonic=lambda: now[0]))
+    return now
+
+
+def test_entry_expires_after_ttl(clock):
+    """An entry is served until its TTL has passed."""
+    cache = TTLCache(ttl=10)
+    cache.set("a", 1)
+
+    clock[0] += 9.9
+    assert cache.get("a") == 1
+
+    clock[0] += 0.1
+    assert cache.get("a") is None
+    assert len(cache) == 0
+
+
+def test_per_entry_ttl_overrides_default(clock):
+    """A TTL given to set() replaces the cache default."""
+    cache = TTLCache(ttl=10)
+    cache.set("short", 1, ttl=1)
+    cache.set("long", 2, ttl=100)
+
+    clock[0] += 50
+    assert cache.get("short", "gone") == "gone"
+    assert cache.get("long") == 2
+
+
+def test_least_recently_used_entry_is_evicted():
+    """Past maxsize the least recently used entry is dropped."""
+    cache = TTLCache(maxsize=2)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.get("a")  # "b" is now the least recently used
+    cache.set("c", 3)
+
+    assert cache.get("b") is None
+    assert cache.get("a") == 1
+    assert cache.get("c") == 3
+
+
+def test_pop_removes_live_entry_only(clock):
+    """pop() returns live values and the default for expired ones."""
+    cache = TTLCache(ttl=10)
+    cache.set("a", 1)
+    cache.set("b", 2)
+
+    assert cache.pop("a") == 1
+    assert cache.get("a") is None
+
+    clock[0] += 10
+    assert cache.pop("b", "expired") == "expired"
+
+
+def _counting_check(result):
+    """A brand check that returns result and counts its calls."""
+    calls = []
+
+    @brand_ttl_cache(ttl=60)
+    async def check(brand_name):
+        calls.append(brand_name)
+        return result
+
+    return check, calls
+
+
+def test_brand_key_is_stripped_and_lowercased():
+    """Spellings of a brand differing in case or padding share a result."""
+    check, calls = _counting_check({"score": 80, "details": {}})
+
+    async def run():
+        await check("Acme")
+        await check("  ACME ")
+        await check("acme")
+
+    asyncio.run(run())
+    assert calls == ["Acme"]
+
+
+def test_brand_result_expires(clock):
+    """A brand is checked again once its result has expired."""
+    check, calls = _counting_check({"score": 80, "details": {}})
+
+    asyncio.run(check("Acme"))
+    clock[0] += 61
+    asyncio.run(check("Acme"))
+
+    assert len(calls) == 2
+
+
+@pytest.mark.parametrize("result", [
+    None,
+    {"score": 0, "details": {"error": "timed out"}},
+])
+def test_none_and_error_results_are_not_cached(result):
+    """Failed checks are run again on the next call."""
+    check, calls = _counting_check(result)
+
+    async def run():
+        await check("Acme")
+        await check("Acme")
+
+    asyncio.run(run())
+    assert len(calls) == 2
+
+
+def test_cache_clear_forgets_results():
+    """cache_clear() drops every cached brand."""
+    check, calls = _counting_check({"score": 80, "details": {}})
+
+    asyncio.run(check("Acme"))
+    check.cache_clear()
+    asyncio.run(check("Acme"))
+
+    assert len(calls) == 2
+
+
+def test_failed_linkedin_search_is_not_cached_as_not_found():
+    """Searches that raise report an error rather than a cacheable 'no page'."""
+    responses = [httpx.Response(403), httpx.Response(403)]
+
+    def handler(request):
+        if responses:
+            return responses.pop()
+        return httpx.Response(200, text="<html></html>")
+
+    async def run():
+        async with httpx.AsyncClient(transport=httpx.MockTransport(handler)) as client:
+            failed = await check_linkedin_presence("Cache Test Brand", client)
+            retried = await check_linkedin_presence("Cache Test Brand", client)
+        return failed, retried
+
+    check_linkedin_presence.cache_clear()
+    failed, retried = asyncio.run(run())
+
+    assert failed["score"] == 0
+    assert "error" in failed["details"]
+    assert retried["details"]["message"] == "No LinkedIn company page found"
+    assert "error" not in retried["details"]
@@ -0,0 +1,135 @@
+import asyncio
+
+import pytest
+
+import services.scorer as scorer_module
+from services.scorer import Scorer
+
+LLM_RESULT = {'score': 90, 'details': {'method': 'openai', 'confidence': 'high'}}
+
+
+def _result(score):
+    return {'score': score, 'details': {'method': 'stub'}}
+
+
+@pytest.fixture
+def checks(monkeypatch):
+    """Stubbed checks; set the scores and delays before scoring."""
+    state = {
+        'linkedin': 80, 'web': 80, 'cheap_delay': 0.0, 'cheap_error': None,
+        'llm_delay': 0.05, 'llm_calls': 0, 'llm_cancelled': 0,
+    }
+
+    async def linkedin(brand_name, client):
+        await asyncio.sleep(state['cheap_delay'])
+        if state['cheap_error']:
+            raise state['cheap_error']
+        return _result(state['linkedin'])
+
+    async def web(brand_name, client):
+        await asyncio.sleep(state['cheap_delay'])
+        return _result(state['web'])
+
+    async def llm(entity):
+        state['llm_calls'] += 1
+        try:
+            await asyncio.sleep(state['llm_delay'])
+        except asyncio.CancelledError:
+            state['llm_cancelled'] += 1
+            raise
+        return LLM_RESULT
+
+    async def wikipedia(entity):
+        return _result(50)
+
+    monkeypatch.setattr(scorer_module, 'check_linkedin_presence', linkedin)
+    monkeypatch.setattr(scorer_module, 'check_web_presence', web)
+    state['install'] = lambda scorer: (
+        monkeypatch.setattr(scorer.llm_checker, 'verify_entity', llm),
+        monkeypatch.setattr(scorer, '_check_wikipedia', wikipedia),
+    )
+    return state
+
+
+def _score(checks, threshold, wait=0.2, times=1):
+    """Score one brand `times` times with a fresh scorer; return the responses."""
+    scorer = Scorer(llm_skip_threshold=threshold, llm_skip_wait=wait)
+    scorer._redis = None
+    checks['install'](scorer)
+
+    async def run():
+        return [await scorer.calculate_score('Acme', 'https://acme.com', store=False) for _ in range(times)]
+
+    return asyncio.run(run())
+
+
+def test_llm_is_skipped_when_cheap_checks_meet_threshold(checks):
+    """A high LinkedIn and web average cancels the LLM call and estimates its score."""
+    checks['llm_delay'] = 5
+    checks['linkedin'], checks['web'] = 90, 70
+
+    response, = _score(checks, threshold=75)
+
+    assert response.score_breakdown.llm_recall == 80
+    assert response.metadata['checks']['llm']['method'] == 'llm_skipped'
+    assert checks['llm_calls'] == 1
+    assert checks['llm_cancelled'] == 1
+
+
+def test_llm_is_awaited_below_threshold(checks):
+    """An average under the threshold keeps the real LLM result."""
+    checks['linkedin'], checks['web'] = 80, 60
+
+    response, = _score(checks, threshold=75)
+
+    assert response.score_breakdown.llm_recall == LLM_RESULT['score']
+    assert checks['llm_cancelled'] == 0
+
+
+def test_llm_is_awaited_when_cheap_checks_are_slow(checks):
+    """Cheap checks that miss llm_skip_wait never cancel the LLM call."""
+    checks['cheap_delay'] = 0.2
+    checks['llm_delay'] = 0.3
+
+    response, = _score(checks, threshold=50, wait=0.05)
+
+    assert response.score_breakdown.llm_recall == LLM_RESULT['score']
+    assert checks['llm_cancelled'] == 0
+
+
+def test_llm_is_awaited_when_a_cheap_check_fails(checks):
+    """A failed cheap check gives no estimate, so the LLM result is used."""
+    checks['cheap_error'] = RuntimeError('search blocked')
+
+    response, = _score(checks, threshold=50)
+
+    assert response.score_breakdown.llm_recall == LLM_RESULT['score']
+    assert checks['llm_cancelled'] == 0
+
+
+def test_llm_is_always_awaited_without_threshold(checks):
+    """With no threshold configured the LLM check is never skipped."""
+    checks['linkedin'], checks['web'] = 100, 100
+
+    response, = _score(checks, threshold=None)
+
+    assert response.score_breakdown.llm_recall == LLM_RESULT['score']
+    assert checks['llm_cancelled'] == 0
+
+
+def test_score_with_estimated_llm_is_not_cached(checks):
+    """A repeat request re-runs the checks instead of reusing an estimate."""
+    checks['llm_delay'] = 5
+
+    first, second = _score(checks, threshold=50, times=2)
+
+    assert checks['llm_calls'] == 2
+    assert not second.metadata['cache_hit']
+
+
+def test_score_with_real_llm_result_is_cached(checks):
+    """A score whose checks all ran is reused for the repeat request."""
+    first, second = _score(checks, threshold=None, times=2)
+
+    assert checks['llm_calls'] == 1
+    assert second.metadata['cache_hit']
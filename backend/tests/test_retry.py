@@ -0,0 +1,169 @@
+import asyncio
+
+import httpx
+import pytest
+
+from utils.rate_limit import TokenBucket
+from utils.retry import MAX_RETRY_AFTER, get_with_retry, transient_retry
+
+URL = "https://api.example.com/items"
+
+
+@pytest.fixture
+def sleeps(monkeypatch):
+    """Record the retry waits instead of sleeping through them."""
+    recorded = []
+
+    async def fake_sleep(seconds):
+        recorded.append(seconds)
+
+    monkeypatch.setattr(get_with_retry.retry, "sleep", fake_sleep)
+    return recorded
+
+
+def _client(*responses):
+    """Client answering each request with the next of responses, repeating the last."""
+    calls = []
+
+    def handler(request):
+        calls.append(request)
+        return responses[min(len(calls), len(responses)) - 1]
+
+    return httpx.AsyncClient(transport=httpx.MockTransport(handler)), calls
+
+
+def _get(client, **kwargs):
+    async def run():
+        async with client:
+            return await get_with_retry(client, URL, **kwargs)
+
+    return asyncio.run(run())
+
+
+@pytest.mark.parametrize("status", [429, 500, 502, 503, 504])
+def test_retryable_status_is_retried_until_success(sleeps, status):
+    """Rate limits and upstream failures are retried."""
+    client, calls = _client(httpx.Response(status), httpx.Response(200, json={"ok": True}))
+
+    response = _get(client)
+
+    assert response.json() == {"ok": True}
+    assert len(calls) == 2
+    assert len(sleeps) == 1
+
+
+def test_retryable_status_gives_up_after_three_attempts(sleeps):
+    """The last error is raised once every attempt has failed."""
+    client, calls = _client(httpx.Response(503))
+
+    with pytest.raises(httpx.HTTPStatusError):
+        _get(client)
+
+    assert len(calls) == 3
+    assert len(sleeps) == 2
+
+
+@pytest.mark.parametrize("status", [400, 401, 403, 404])
+def test_other_client_errors_are_raised_at_once(sleeps, status):
+    """A 4xx other than 429 would fail again, so it is not retried."""
+    client, calls = _client(httpx.Response(status))
+
+    with pytest.raises(httpx.HTTPStatusError):
+        _get(client)
+
+    assert len(calls) == 1
+    assert sleeps == []
+
+
+def test_transport_errors_are_retried(sleeps):
+    """Connection failures and timeouts are retried."""
+    attempts = []
+
+    def handler(request):
+        attempts.append(request)
+        if len(attempts) == 1:
+            raise httpx.ConnectTimeout("timed out", request=request)
+        return httpx.Response(200)
+
+    _get(httpx.AsyncClient(transport=httpx.MockTransport(handler)))
+
+    assert len(attempts) == 2
+
+
+def test_retry_after_is_honoured(sleeps):
+    """The server's Retry-After is used as the wait."""
+    client, _ = _client(
+        httpx.Response(429, headers={"Retry-After": "2"}), httpx.Response(200)
+    )
+
+    _get(client)
+
+    assert sleeps == [2.0]
+
+
+def test_retry_after_is_capped(sleeps):
+    """A long Retry-After is cut to MAX_RETRY_AFTER."""
+    client, _ = _client(
+        httpx.Response(503, headers={"Retry-After": "120"}), httpx.Response(200)
+    )
+
+    _get(client)
+
+    assert sleeps == [MAX_RETRY_AFTER]
+
+
+def test_missing_retry_after_falls_back_to_backoff(sleeps):
+    """Without Retry-After the jittered exponential backoff is used."""
+    client, _ = _client(httpx.Response(502), httpx.Response(502), httpx.Response(200))
+
+    _get(client)
+
+    assert len(sleeps) == 2
+    assert all(0 <= s <= 8 for s in sleeps)
+
+
+def test_bucket_and_semaphore_taken_on_every_attempt(sleeps):
+    """Each retry waits for a token and holds the concurrency gate again."""
+    tokens = []
+    slots = []
+
+    class CountingBucket(TokenBucket):
+        async def acquire(self):
+            tokens.append(1)
+
+    class CountingSemaphore(asyncio.Semaphore):
+        async def acquire(self):
+            slots.append(1)
+            return await super().acquire()
+
+    client, calls = _client(httpx.Response(503), httpx.Response(503), httpx.Response(200))
+
+    async def run():
+        semaphore = CountingSemaphore(1)
+        async with client:
+            await get_with_retry(client, URL, CountingBucket(1, 1), semaphore)
+        return semaphore
+
+    semaphore = asyncio.run(run())
+
+    assert len(calls) == len(tokens) == len(slots) == 3
+    assert not semaphore.locked()
+
+
+def test_transient_retry_respects_attempts():
+    """transient_retry stops after the given number of calls."""
+    calls = []
+
+    @transient_retry(attempts=5)
+    async def flaky():
+        calls.append(1)
+        raise httpx.ReadTimeout("slow")
+
+    async def no_sleep(seconds):
+        pass
+
+    flaky.retry.sleep = no_sleep
+    with pytest.raises(httpx.ReadTimeout):
+        asyncio.run(flaky())
+
+    assert len(calls) == 5
@@ -1,54 +1,234 @@
+import asyncio
+
+import httpx
+import orjson
 import pytest
-from unittest.mock import MagicMock
 
-from geoscore.utils.wiki_check import check_wikipedia_presence
+import utils.redis_client as redis_client
+import utils.wiki_check as wiki_check
+from utils.wiki_check import WikiResult, WikipediaChecker, check_wikipedia_presence
+
+INTRO = "Test Page is a place. " * 30  # 660 characters
+
+
+def _handler(status=200, extract=INTRO, missing=(), calls=None, normalized=None, redirects=None):
+    """MediaWiki API stand-in serving extracts and section lists."""
+    normalized = normalized or {}
+    redirects = redirects or {}
+
+    def handler(request):
+        params = dict(request.url.params)
+        if calls is not None:
+            calls.append((params["action"], params.get("titles") or params.get("page")))
+        if status != 200:
+            return httpx.Response(status)
+        if params["action"] == "parse":
+            return httpx.Response(200, json={"parse": {"sections": [
+                {"toclevel": 1, "line": "History"},
+                {"toclevel": 2, "line": "Early years"},
+                {"toclevel": 1, "line": "Geography"},
+            ]}})
+        requested = params["titles"].split("|")
+        # Each requested title as normalized, then as redirected
+        titles = [normalized.get(title, title) for title in requested]
+        titles = [redirects.get(title, title) for title in titles]
+        pages = []
+        for title in dict.fromkeys(titles):
+            if title in missing:
+                pages.append({"ns": 0, "title": title, "missing": True})
+            else:
+                pages.append({
+                    "pageid": 1,
+                    "ns": 0,
+                    "title": title,
+                    "extract": extract,
+                    "fullurl": f"https://en.wikipedia.org/wiki/{title.replace(' ', '_')}",
+                })
+        query = {
+            "normalized": [{"from": t, "to": normalized[t]} for t in requested if t in normalized],
+            "redirects": [
+                {"from": t, "to": redirects[t]}
+                for t in dict.fromkeys(normalized.get(t, t) for t in requested) if t in redirects
+            ],
+            "pages": pages,
+        }
+        return httpx.Response(200, json={"query": query})
+
+    return handler
+
+
+@pytest.fixture
+def use_transport(monkeypatch):
+    """Point the shared Wikipedia client at a mock handler, with fresh checkers."""
+    monkeypatch.setattr(redis_client, "REDIS_URL", None)
+    monkeypatch.setattr(redis_client, "_redis", None)
+
+    def install(handler):
+        monkeypatch.setattr(
+            wiki_check, "_client", httpx.AsyncClient(transport=httpx.MockTransport(handler))
+        )
+        wiki_check._checker_for.cache_clear()
+
+    yield install
+    wiki_check._checker_for.cache_clear()
+
+
+def test_check_wikipedia_presence_success(use_transport):
+    """An existing page scores from its intro and sections."""
+    use_transport(_handler())
+
+    result = asyncio.run(check_wikipedia_presence("Test Page"))
 
+    assert result == {
+        "score": 100,
+        "url": "https://en.wikipedia.org/wiki/Test_Page",
+        "details": {
+            "exists": True,
+            "title": "Test Page",
+            "summary_length": len(INTRO),
+            "confidence": "high",
+            "method": "wikipedia_api",
+        },
+    }
 
-def test_check_wikipedia_presence_success(mock_wikipedia_page):
-    """Test successful Wikipedia page check."""
-    result = check_wikipedia_presence("Test Page")
-    assert result["score"] > 0
-    assert result["page_url"] is not None
-    assert result["summary"] == "Test summary"
 
+def test_check_wikipedia_presence_nonexistent_page(use_transport):
+    """A missing page scores 0 without fetching its sections."""
+    calls = []
+    use_transport(_handler(missing={"Nonexistent Page"}, calls=calls))
+
+    result = asyncio.run(check_wikipedia_presence("Nonexistent Page"))
 
-def test_check_wikipedia_presence_nonexistent_page():
-    """Test Wikipedia check with non-existent page."""
-    mock_page = MagicMock()
-    mock_page.exists.return_value = False
-    
-    with patch("wikipediaapi.Wikipedia") as mock_wiki:
-        mock_wiki.return_value.page.return_value = mock_page
-        result = check_wikipedia_presence("Nonexistent Page")
-    
     assert result["score"] == 0
-    assert result["page_url"] is None
-    assert "No Wikipedia page found" in result["summary"]
+    assert result["url"] is None
+    assert result["details"]["exists"] is False
+    assert result["details"]["message"] == "No Wikipedia page found"
+    assert [action for action, _ in calls] == ["query"]
+
 
+def test_check_wikipedia_presence_error_handling(use_transport):
+    """A failed lookup scores 0 and reports the error."""
+    use_transport(_handler(status=403))
+
+    result = asyncio.run(check_wikipedia_presence("Test Page"))
 
-def test_check_wikipedia_presence_error_handling():
-    """Test error handling in Wikipedia check."""
-    with patch("wikipediaapi.Wikipedia") as mock_wiki:
-        mock_wiki.side_effect = Exception("API Error")
-        result = check_wikipedia_presence("Test Page")
-    
     assert result["score"] == 0
-    assert result["page_url"] is None
-    assert "Error checking Wikipedia" in result["summary"]
-
-
-def test_wikipedia_scoring_quality(mock_wikipedia_page):
-    """Test the quality scoring of Wikipedia pages."""
-    # Test with minimal content
-    mock_wikipedia_page.text = "Short content"
-    result = check_wikipedia_presence("Test Page")
-    low_score = result["score"]
-    
-    # Test with more substantial content
-    mock_wikipedia_page.text = "Longer content with more details and information. " * 50
-    result = check_wikipedia_presence("Test Page")
-    high_score = result["score"]
-    
-    assert high_score > low_score
-    assert 0 <= low_score <= 100
-    assert 0 <= high_score <= 100
+    assert result["url"] is None
+    assert "403" in result["details"]["error"]
+    assert result["details"]["message"] == "Error checking Wikipedia"
+
+
+def test_check_wikipedia_presence_uses_language(use_transport):
+    """The language picks the wiki the lookup is sent to."""
+    calls = []
+
+    def handler(request):
+        calls.append(request.url.host)
+        return _handler()(request)
+
+    use_transport(handler)
+
+    asyncio.run(check_wikipedia_presence("Test Page", language="de"))
+
+    assert set(calls) == {"de.wikipedia.org"}
+
+
+def test_wikipedia_scoring_quality(use_transport):
+    """A page with a longer intro scores higher."""
+    use_transport(_handler(extract="Short."))
+    low_score = asyncio.run(check_wikipedia_presence("Short Page"))["score"]
+
+    use_transport(_handler())
+    high_score = asyncio.run(check_wikipedia_presence("Long Page"))["score"]
+
+    assert 0 <= low_score < high_score <= 100
+
+
+class FakeRedis:
+    """Just enough of redis.asyncio.Redis for the checker's Redis tier."""
+
+    def __init__(self):
+        self.data = {}
+
+    async def mget(self, keys):
+        return [self.data.get(key) for key in keys]
+
+    async def set(self, key, value, ex=None):
+        self.data[key] = value
+
+
+def test_redis_old_format_entry_is_treated_as_miss():
+    """A nested-dict entry from before WikiResult is looked up again and rewritten."""
+    redis = FakeRedis()
+    calls = []
+    client = httpx.AsyncClient(transport=httpx.MockTransport(_handler(calls=calls)))
+    checker = WikipediaChecker(client=client, redis=redis)
+    redis.data[checker._redis_key("Test Page")] = orjson.dumps(
+        {"score": 90, "url": "https://old", "details": {"exists": True, "summary_length": 10}}
+    )
+
+    result = asyncio.run(checker.check_entity("Test Page"))
+
+    assert isinstance(result, WikiResult)
+    assert result.score == 100
+    assert calls[0] == ("query", "Test Page")
+    assert orjson.loads(redis.data[checker._redis_key("Test Page")])["summary_length"] == len(INTRO)
+
+
+def test_redis_entry_is_shared_between_checkers():
+    """A result written by one checker is read back by another as a WikiResult."""
+    redis = FakeRedis()
+    client = httpx.AsyncClient(transport=httpx.MockTransport(_handler(missing={"Nowhere"})))
+    first = asyncio.run(WikipediaChecker(client=client, redis=redis).check_entity("Nowhere"))
+
+    second_checker = WikipediaChecker(client=client, redis=redis)
+    second = asyncio.run(second_checker.check_entity("Nowhere"))
+
+    assert second == first == WikiResult(score=0, url=None, exists=False)
+    assert second_checker.cache_stats["redis_hits"] == 1
+
+
+def _batch(names, **handler_options):
+    """Run check_entities_batch against the mock API, returning results and calls."""
+    calls = []
+    client = httpx.AsyncClient(transport=httpx.MockTransport(_handler(calls=calls, **handler_options)))
+    checker = WikipediaChecker(client=client, redis=FakeRedis())
+    return asyncio.run(checker.check_entities_batch(names)), calls
+
+
+def test_batch_follows_normalization_and_redirects():
+    """Names are mapped through normalized and redirected titles to their page."""
+    results, calls = _batch(
+        ["apple", "Apple Inc.", "Nopey"],
+        normalized={"apple": "Apple"},
+        redirects={"Apple": "Apple Inc."},
+        missing={"Nopey"},
+    )
+
+    assert [r.title for r in results] == ["Apple Inc.", "Apple Inc.", None]
+    assert [r.exists for r in results] == [True, True, False]
+    assert results[0] == results[1]
+    assert results[0].score == 100
+    # One extracts query for the chunk and one sections request per resolved page
+    assert calls == [("query", "apple|Apple Inc.|Nopey"), ("parse", "Apple Inc.")]
+
+
+def test_batch_chunks_titles_per_query():
+    """Lookups are split into queries of at most MAX_TITLES_PER_QUERY titles."""
+    names = [f"Place {i}" for i in range(2 * wiki_check.MAX_TITLES_PER_QUERY + 5)]
+
+    results, calls = _batch(names)
+
+    queries = [titles.split("|") for action, titles in calls if action == "query"]
+    assert sorted(len(q) for q in queries) == [5, wiki_check.MAX_TITLES_PER_QUERY, wiki_check.MAX_TITLES_PER_QUERY]
+    assert sorted(t for q in queries for t in q) == sorted(names)
+    assert [r.title for r in results] == names
+
+
+def test_batch_results_follow_input_order_with_duplicates():
+    """Duplicate names are looked up once and answered at every position."""
+    results, calls = _batch(["Rome", "Missing Town", "Rome", "Oslo"], missing={"Missing Town"})
+
+    assert [r.title for r in results] == ["Rome", None, "Rome", "Oslo"]
+    assert calls[0] == ("query", "Rome|Missing Town|Oslo")
+    assert sorted(page for action, page in calls if action == "parse") == ["Oslo", "Rome"]
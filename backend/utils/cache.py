@@ -0,0 +1,88 @@
+"""
+In-process TTL caching for check results.
+"""
+import time
+from collections import OrderedDict
+from functools import wraps
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional, Tuple
+
+
+class TTLCache:
+    """Bounded LRU mapping whose entries expire ``ttl`` seconds after they are set."""
+
+    def __init__(self, maxsize: int = 10_000, ttl: float = 3600):
+        """
+        Initialize an empty cache.
+
+        Args:
+            maxsize: Maximum number of entries, least recently used evicted first
+            ttl: Default seconds an entry stays valid
+        """
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data: OrderedDict[Hashable, Tuple[float, Any]] = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        """Return the live value for key, or default if missing or expired."""
+        entry = self._data.get(key)
+        if entry is None:
+            return default
+        if time.monotonic() >= entry[0]:
+            del self._data[key]
+            return default
+        self._data.move_to_end(key)
+        return entry[1]
+
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = None) -> None:
+        """Store value under key for ttl seconds (default: the cache's ttl)."""
+        self._data[key] = (time.monotonic() + (self.ttl if ttl is None else ttl), value)
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+
+    def pop(self, key: Hashable, default: Any = None) -> Any:
+        """Remove key and return its value, or default if missing or expired."""
+        entry = self._data.pop(key, None)
+        if entry is None or time.monotonic() >= entry[0]:
+            return default
+        return entry[1]
+
+    def clear(self) -> None:
+        """Drop every entry."""
+        self._data.clear()
+
+
+def brand_ttl_cache(ttl: float = 3600, maxsize: int = 10_000):
+    """
+    Cache an async check's result per brand name for ``ttl`` seconds.
+
+    The cache key is the first positional argument, stripped and lowercased,
+    so the decorated function must take the brand name first. Results that
+    are None or report an error in their details are not cached, so failed
+    lookups are retried on the next call.
+
+    Args:
+        ttl: Seconds a result is reused
+        maxsize: Maximum number of cached brands, least recently used evicted first
+    """
+    def decorator(func: Callable[..., Awaitable[Optional[Dict[str, Any]]]]):
+        cache = TTLCache(maxsize, ttl)
+
+        @wraps(func)
+        async def wrapper(brand_name: str, *args, **kwargs):
+            key = brand_name.strip().lower()
+            result = cache.get(key)
+            if result is not None:
+                return result
+
+            result = await func(brand_name, *args, **kwargs)
+            if result is not None and 'error' not in result.get('details', {}):
+                cache.set(key, result)
+            return result
+
+        wrapper.cache_clear = cache.clear
+        return wrapper
+    return decorator
@@ -1,100 +1,155 @@
 """
 Utility for checking if a company has a LinkedIn presence.
 """
-from typing import Dict, Any, Optional
-import requests
-from bs4 import BeautifulSoup
-from urllib.parse import quote_plus
+from typing import Dict, Any, List, Optional
+import asyncio
+import logging
+import httpx
+from selectolax.lexbor import LexborHTMLParser
+import random
 import re
-from fake_useragent import UserAgent
 
+from utils.cache import brand_ttl_cache
+from utils.rate_limit import host_bucket
+from utils.retry import get_with_retry
 
-def check_google_search(company_name: str) -> Optional[Dict[str, Any]]:
-    """Check LinkedIn presence using Google search."""
-    try:
-        query = f"{company_name} site:linkedin.com/company"
-        search_url = f"https://www.google.com/search?q={quote_plus(query)}&hl=en"
-        
-        ua = UserAgent()
-        headers = {
-            "User-Agent": ua.random,
-            "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8",
-            "Accept-Language": "en-US,en;q=0.5",
-            "Referer": "https://www.google.com/",
-        }
-        
-        response = requests.get(search_url, headers=headers, timeout=10)
-        response.raise_for_status()
-        
-        soup = BeautifulSoup(response.text, 'html.parser')
-        linkedin_urls = []
-        
-        for a in soup.find_all('a', href=True):
-            href = a['href']
-            if 'linkedin.com/company/' in href and 'google.com' not in href:
-                match = re.search(r'url\?q=([^&]+)', href)
-                if match:
-                    url = match.group(1)
-                    if url not in linkedin_urls:
-                        linkedin_urls.append(url)
-        
-        if linkedin_urls:
-            return {
-                'score': 100,
-                'url': linkedin_urls[0].split('&')[0],
-                'details': {
-                    'method': 'google_search',
-                    'matches_found': len(linkedin_urls),
-                    'confidence': 'high'
-                }
+logger = logging.getLogger(__name__)
+
+GOOGLE_SEARCH_URL = "https://www.google.com/search"
+BING_SEARCH_URL = "https://www.bing.com/search"
+
+# Recent desktop browser user agents, rotated per Google request
+_UA_POOL = (
+    "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/124.0.0.0 Safari/537.36",
+    "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/123.0.0.0 Safari/537.36",
+    "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/122.0.0.0 Safari/537.36",
+    "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/124.0.0.0 Safari/537.36 Edg/124.0.0.0",
+    "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/123.0.0.0 Safari/537.36 Edg/123.0.0.0",
+    "Mozilla/5.0 (Windows NT 10.0; Win64; x64; rv:125.0) Gecko/20100101 Firefox/125.0",
+    "Mozilla/5.0 (Windows NT 10.0; Win64; x64; rv:124.0) Gecko/20100101 Firefox/124.0",
+    "Mozilla/5.0 (Windows NT 10.0; Win64; x64; rv:115.0) Gecko/20100101 Firefox/115.0",
+    "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/124.0.0.0 Safari/537.36",
+    "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/123.0.0.0 Safari/537.36",
+    "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/605.1.15 (KHTML, like Gecko) Version/17.4.1 Safari/605.1.15",
+    "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/605.1.15 (KHTML, like Gecko) Version/17.3.1 Safari/605.1.15",
+    "Mozilla/5.0 (Macintosh; Intel Mac OS X 14.4; rv:125.0) Gecko/20100101 Firefox/125.0",
+    "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/124.0.0.0 Safari/537.36 Edg/124.0.0.0",
+    "Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/124.0.0.0 Safari/537.36",
+    "Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/123.0.0.0 Safari/537.36",
+    "Mozilla/5.0 (X11; Linux x86_64; rv:125.0) Gecko/20100101 Firefox/125.0",
+    "Mozilla/5.0 (X11; Ubuntu; Linux x86_64; rv:124.0) Gecko/20100101 Firefox/124.0",
+    "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/124.0.0.0 Safari/537.36 OPR/110.0.0.0",
+    "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/121.0.0.0 Safari/537.36",
+)
+
+# LinkedIn company URL in a Google result redirect link (/url?q=...)
+_URL_Q_RE = re.compile(r'url\?q=(https?://(?:[a-z0-9-]+\.)?linkedin\.com/company/[^&]+)')
+
+# Anchors that mention a company page; everything else stays out of Python
+_GOOGLE_LINK_SELECTOR = 'a[href*="linkedin.com/company/"]'
+
+# Bing result title links to a company page; the i flag matches the URL case-insensitively
+_BING_LINK_SELECTOR = 'li.b_algo h2 a[href*="linkedin.com/company/" i]'
+
+
+def _parse_google_serp(html: str) -> List[str]:
+    """Extract distinct LinkedIn company URLs from a Google results page."""
+    tree = LexborHTMLParser(html)
+    found = {}  # insertion-ordered set of matched URLs
+    
+    for a in tree.css(_GOOGLE_LINK_SELECTOR):
+        href = a.attributes.get('href') or ''
+        match = _URL_Q_RE.search(href)
+        if match and 'google.com' not in href:
+            found.setdefault(match.group(1))
+    return list(found)
+
+
+def _parse_bing_serp(html: str) -> List[str]:
+    """Extract distinct LinkedIn company URLs from a Bing results page."""
+    tree = LexborHTMLParser(html)
+    found = {}  # insertion-ordered set of matched URLs
+    
+    for a_tag in tree.css(_BING_LINK_SELECTOR):
+        found.setdefault((a_tag.attributes.get('href') or '').split('?')[0])
+    return list(found)
+
+
+async def check_google_search(company_name: str, client: httpx.AsyncClient) -> Optional[Dict[str, Any]]:
+    """
+    Check LinkedIn presence using Google search.
+    
+    Returns None if the search found no company page; errors are raised
+    so the caller can tell a failed search from an empty one.
+    """
+    query = f"{company_name} site:linkedin.com/company"
+    
+    headers = {
+        "User-Agent": random.choice(_UA_POOL),
+        "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8",
+        "Accept-Language": "en-US,en;q=0.5",
+        "Referer": "https://www.google.com/",
+    }
+    
+    response = await get_with_retry(
+        client, GOOGLE_SEARCH_URL, host_bucket('www.google.com'),
+        params={'q': query, 'hl': 'en'}, headers=headers, timeout=10
+    )
+    
+    # Parse in a worker thread so other checks keep running meanwhile
+    linkedin_urls = await asyncio.to_thread(_parse_google_serp, response.text)
+    
+    if linkedin_urls:
+        return {
+            'score': 100,
+            'url': linkedin_urls[0].split('&')[0],
+            'details': {
+                'method': 'google_search',
+                'matches_found': len(linkedin_urls),
+                'confidence': 'high'
             }
-    except Exception as e:
-        print(f"Google search failed: {e}")
+        }
     return None
 
-def check_bing_search(company_name: str) -> Optional[Dict[str, Any]]:
-    """Check LinkedIn presence using Bing search."""
-    try:
-        query = f'site:linkedin.com/company "{company_name}"'
-        search_url = f"https://www.bing.com/search?q={quote_plus(query)}"
-        
-        headers = {
-            "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36"
-        }
-        
-        response = requests.get(search_url, headers=headers, timeout=15)
-        response.raise_for_status()
-        
-        soup = BeautifulSoup(response.text, 'html.parser')
-        links = []
-        
-        for a_tag in soup.select('li.b_algo h2 a'):
-            href = a_tag.get('href', '')
-            if 'linkedin.com/company/' in href.lower():
-                clean_url = href.split('?')[0]
-                if clean_url not in links:
-                    links.append(clean_url)
-        
-        if links:
-            return {
-                'score': 100,
-                'url': links[0],
-                'details': {
-                    'method': 'bing_search',
-                    'matches_found': len(links),
-                    'confidence': 'high'
-                }
+async def check_bing_search(company_name: str, client: httpx.AsyncClient) -> Optional[Dict[str, Any]]:
+    """
+    Check LinkedIn presence using Bing search.
+    
+    Returns None if the search found no company page; errors are raised.
+    """
+    query = f'site:linkedin.com/company "{company_name}"'
+    
+    headers = {
+        "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36"
+    }
+    
+    response = await get_with_retry(
+        client, BING_SEARCH_URL, host_bucket('www.bing.com'),
+        params={'q': query}, headers=headers, timeout=15
+    )
+    
+    links = await asyncio.to_thread(_parse_bing_serp, response.text)
+    
+    if links:
+        return {
+            'score': 100,
+            'url': links[0],
+            'details': {
+                'method': 'bing_search',
+                'matches_found': len(links),
+                'confidence': 'high'
             }
-    except Exception as e:
-        print(f"Bing search failed: {e}")
+        }
     return None
 
-def check_linkedin_presence(company_name: str) -> Dict[str, Any]:
+@brand_ttl_cache()
+async def check_linkedin_presence(company_name: str, client: httpx.AsyncClient) -> Dict[str, Any]:
     """
-    Check if a company has a LinkedIn presence by searching Google first, then Bing.
+    Check if a company has a LinkedIn presence by searching Google and Bing concurrently.
     
     Args:
         company_name: Name of the company to check
+        client: Shared HTTP client used for the search requests
         
     Returns:
         Dictionary containing:
@@ -102,23 +157,50 @@ def check_linkedin_presence(company_name: str) -> Dict[str, Any]:
         - url: Optional[str] - LinkedIn URL if found
         - details: Dict with additional information
     """
-    # Try Google first
-    result = check_google_search(company_name)
+    # Query both engines at once and take the first one that finds a page
+    pending = {
+        asyncio.create_task(check_google_search(company_name, client)),
+        asyncio.create_task(check_bing_search(company_name, client)),
+    }
+    result = None
+    errors = []
+    try:
+        while pending and not result:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                error = task.exception()
+                if error is not None:
+                    logger.debug("LinkedIn search failed for %s", company_name, exc_info=error)
+                    errors.append(error)
+                else:
+                    result = result or task.result()
+    finally:
+        # Cancel the slower search once we have an answer
+        for task in pending:
+            task.cancel()
     
-    # If Google fails, try Bing
-    if not result:
-        result = check_bing_search(company_name)
+    if result:
+        return result
     
-    # If both fail, return not found
-    if not result:
+    # Nothing found; if a search failed that is not a real "no page", so
+    # report the error and keep the result out of the caches
+    if errors:
         return {
             'score': 0,
             'url': None,
             'details': {
                 'method': 'search',
-                'message': 'No LinkedIn company page found',
-                'confidence': 'medium'
+                'error': '; '.join(str(e) for e in errors),
+                'message': 'Error checking LinkedIn',
+                'confidence': 'low'
             }
         }
-    
-    return result
+    return {
+        'score': 0,
+        'url': None,
+        'details': {
+            'method': 'search',
+            'message': 'No LinkedIn company page found',
+            'confidence': 'medium'
+        }
+    }
@@ -2,10 +2,14 @@
 Utility for verifying geographical entities using LLM.
 """
 import os
+import httpx
 import openai
+import orjson
 import logging
 from typing import Dict, Any, Optional
 from models.schemas import GeoEntity
+from utils.rate_limit import host_semaphore
+from utils.retry import transient_retry
 from dotenv import load_dotenv
 
 # Configure logging
@@ -16,7 +20,61 @@ logger = logging.getLogger(__name__)
 load_dotenv()
 
 # Configure OpenAI API key
-openai.api_key = os.getenv('OPENAI_API_KEY')
+OPENAI_API_KEY = os.getenv('OPENAI_API_KEY')
+
+# Models that predate JSON mode and reject response_format
+_NO_JSON_MODE_MODELS = frozenset({'gpt-4', 'gpt-4-0314', 'gpt-4-0613', 'gpt-4-32k'})
+
+# Process-wide client so connections to the OpenAI API are reused across checks
+_client: Optional[openai.AsyncOpenAI] = None
+
+
+def get_openai_client() -> openai.AsyncOpenAI:
+    """Return the shared OpenAI client, creating it on first use."""
+    global _client
+    if _client is None:
+        # LLMChecker retries failed calls itself
+        _client = openai.AsyncOpenAI(
+            api_key=OPENAI_API_KEY,
+            max_retries=0,
+            http_client=openai.DefaultAsyncHttpxClient(
+                http2=True,
+                limits=httpx.Limits(max_connections=20, max_keepalive_connections=10),
+            ),
+        )
+    return _client
+
+
+async def close_openai_client() -> None:
+    """Close the shared OpenAI client if it was created."""
+    global _client
+    if _client is not None:
+        await _client.close()
+        _client = None
+
+# Brand familiarity prompt, split around the brand name so only that part varies
+_PROMPT_HEAD = """
+You are evaluating how well-known the following brand or company is:
+
+Brand Name: """
+
+_PROMPT_TAIL = """
+
+Please provide:
+
+1. How well do you know this brand?
+2. Type of the entity (company, product, startup, etc.).
+3. Mention 2-3 known facts about this brand.
+4. Confidence score (0-100) based on your familiarity.
+
+Respond ONLY in JSON like this:
+{
+  "exists": true/false,
+  "type": "company/startup/product",
+  "confidence": 0-100,
+  "details": "Brief explanation"
+}
+"""
 
 class LLMChecker:
     """Handles verification of geographical entities using LLM."""
@@ -44,54 +102,43 @@ class LLMChecker:
             - confidence: float (0-1)
             - details: Dict with additional information
         """
-        if not openai.api_key:
+        if not OPENAI_API_KEY:
             logger.warning("OpenAI API key not found. Skipping LLM check.")
             return self._create_error_response("OpenAI API key not configured")
         
         prompt = self._create_prompt(entity)
         
-        for attempt in range(self.max_retries):
-            try:
-                response = await openai.ChatCompletion.acreate(
-                    model=self.model,
-                    messages=[
-                        {"role": "system", "content": "You are a helpful assistant that verifies geographical entities."},
-                        {"role": "user", "content": prompt}
-                    ],
-                    temperature=0.3,
-                    max_tokens=500
-                )
-                
-                return self._parse_response(response, entity.name)
-                
-            except Exception as e:
-                if attempt == self.max_retries - 1:
-                    logger.error(f"LLM verification failed after {self.max_retries} attempts: {str(e)}")
-                    return self._create_error_response(f"LLM verification failed: {str(e)}")
-                continue
+        # Ask for a JSON object directly where the model supports it
+        extra = {}
+        if self.model not in _NO_JSON_MODE_MODELS:
+            extra['response_format'] = {"type": "json_object"}
+        
+        try:
+            # Rate limits, 5xx and connection errors are retried with backoff
+            response = await transient_retry(self.max_retries)(self._complete)(prompt, extra)
+        except Exception as e:
+            logger.error(f"LLM verification failed: {str(e)}")
+            return self._create_error_response(f"LLM verification failed: {str(e)}")
+        
+        return self._parse_response(response, entity.name)
+    
+    async def _complete(self, prompt: str, extra: Dict[str, Any]) -> Any:
+        """Send the verification prompt to the chat completions API."""
+        async with host_semaphore('api.openai.com'):
+            return await get_openai_client().chat.completions.create(
+                model=self.model,
+                messages=[
+                    {"role": "system", "content": "You are a helpful assistant that verifies geographical entities."},
+                    {"role": "user", "content": prompt}
+                ],
+                temperature=0.3,
+                max_tokens=500,
+                **extra
+            )
     
     def _create_prompt(self, entity: GeoEntity) -> str:
         """Create a prompt for the LLM to assess brand recognition and familiarity."""
-        return f"""
-You are evaluating how well-known the following brand or company is:
-
-Brand Name: {entity.name}
-
-Please provide:
-
-1. How well do you know this brand?
-2. Type of the entity (company, product, startup, etc.).
-3. Mention 2-3 known facts about this brand.
-4. Confidence score (0-100) based on your familiarity.
-
-Respond ONLY in JSON like this:
-{{
-  "exists": true/false,
-  "type": "company/startup/product",
-  "confidence": 0-100,
-  "details": "Brief explanation"
-}}
-"""
+        return _PROMPT_HEAD + entity.name + _PROMPT_TAIL
     
     def _parse_response(self, response: Any, entity_name: str) -> Dict[str, Any]:
         """Parse the LLM response into a structured format."""
@@ -99,8 +146,7 @@ Respond ONLY in JSON like this:
             content = response.choices[0].message.content
             
             # Try to parse the JSON response
-            import json
-            result = json.loads(content.strip())
+            result = orjson.loads(content)
             
             # Calculate score based on existence and confidence
             if result.get('exists', False):
@@ -119,7 +165,7 @@ Respond ONLY in JSON like this:
                 }
             }
             
-        except (json.JSONDecodeError, KeyError, AttributeError) as e:
+        except (orjson.JSONDecodeError, KeyError, AttributeError) as e:
             logger.error(f"Failed to parse LLM response: {str(e)}")
             return self._create_error_response(f"Invalid response format from LLM: {str(e)}")
     
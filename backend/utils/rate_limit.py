@@ -0,0 +1,70 @@
+"""
+Client-side rate limiting for outbound search requests.
+"""
+import asyncio
+import time
+from typing import Dict
+
+
+class TokenBucket:
+    """Async token bucket: bursts up to ``capacity``, then ``refill_rate`` requests per second."""
+
+    def __init__(self, capacity: float, refill_rate: float):
+        """
+        Initialize the bucket full.
+
+        Args:
+            capacity: Maximum number of tokens held
+            refill_rate: Tokens added per second
+        """
+        self.capacity = capacity
+        self.refill_rate = refill_rate
+        self._tokens = capacity
+        self._updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self) -> None:
+        """Wait until a token is available and take it."""
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.refill_rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                await asyncio.sleep((1 - self._tokens) / self.refill_rate)
+
+
+# Google Custom Search allows 300 queries per minute
+cse_bucket = TokenBucket(capacity=5, refill_rate=5)
+
+# One bucket per scraped search host
+_host_buckets: Dict[str, TokenBucket] = {}
+
+
+def host_bucket(host: str, capacity: float = 2, refill_rate: float = 1) -> TokenBucket:
+    """Return the shared bucket for a scraped host, creating it on first use."""
+    bucket = _host_buckets.get(host)
+    if bucket is None:
+        bucket = _host_buckets[host] = TokenBucket(capacity, refill_rate)
+    return bucket
+
+
+# Requests allowed in flight at once per upstream host
+HOST_CONCURRENCY = {
+    'www.googleapis.com': 5,   # Google Custom Search
+    'api.openai.com': 20,
+    'www.google.com': 2,       # search scraping
+    'www.bing.com': 2,         # search scraping
+}
+
+_host_semaphores: Dict[str, asyncio.Semaphore] = {}
+
+
+def host_semaphore(host: str, default: int = 4) -> asyncio.Semaphore:
+    """Return the shared concurrency gate for a host, creating it on first use."""
+    semaphore = _host_semaphores.get(host)
+    if semaphore is None:
+        semaphore = _host_semaphores[host] = asyncio.Semaphore(HOST_CONCURRENCY.get(host, default))
+    return semaphore
@@ -0,0 +1,37 @@
+"""
+Optional shared Redis connection.
+
+Redis is used when the redis package is installed and REDIS_URL is set;
+otherwise every caller falls back to its in-process behaviour.
+"""
+import os
+from typing import Any, Optional
+
+try:
+    import redis.asyncio as aioredis
+    _REDIS_AVAILABLE = True
+except ImportError:  # pragma: no cover - depends on the environment
+    aioredis = None
+    _REDIS_AVAILABLE = False
+
+REDIS_URL = os.getenv('REDIS_URL')
+
+# Process-wide client over a bounded connection pool
+_redis: Optional[Any] = None
+
+
+def get_redis() -> Optional[Any]:
+    """Return the shared Redis client, or None if Redis is not configured."""
+    global _redis
+    if _redis is None and _REDIS_AVAILABLE and REDIS_URL:
+        pool = aioredis.ConnectionPool.from_url(REDIS_URL, max_connections=32)
+        _redis = aioredis.Redis(connection_pool=pool)
+    return _redis
+
+
+async def close_redis() -> None:
+    """Close the shared Redis client and its pool if they were created."""
+    global _redis
+    if _redis is not None:
+        await _redis.aclose()
+        _redis = None
@@ -0,0 +1,103 @@
+"""
+Retry policy for outbound HTTP and OpenAI calls.
+"""
+import asyncio
+from typing import Any, Optional
+
+import httpx
+import openai
+from tenacity import (
+    retry,
+    retry_if_exception,
+    stop_after_attempt,
+    wait_random_exponential,
+)
+from tenacity.wait import wait_base
+
+from utils.rate_limit import TokenBucket, host_semaphore
+
+# Statuses worth retrying: rate limited or a failing upstream. Other 4xx
+# responses would fail the same way again, so they are raised at once
+RETRY_STATUSES = frozenset({429, 500, 502, 503, 504})
+
+# Longest Retry-After we are willing to sleep for inside a request
+MAX_RETRY_AFTER = 8.0
+
+
+def _status_code(exc: BaseException) -> Optional[int]:
+    """HTTP status of an httpx or OpenAI status error, if any."""
+    response = getattr(exc, 'response', None)
+    return getattr(response, 'status_code', None)
+
+
+def _is_transient(exc: BaseException) -> bool:
+    """True for connection failures, timeouts and retryable HTTP statuses."""
+    if isinstance(exc, (httpx.TransportError, openai.APIConnectionError)):
+        return True
+    return isinstance(exc, (httpx.HTTPStatusError, openai.APIStatusError)) and \
+        _status_code(exc) in RETRY_STATUSES
+
+
+class wait_retry_after(wait_base):
+    """Sleep for the server's Retry-After when it sends one, else defer to ``fallback``."""
+
+    def __init__(self, fallback: wait_base):
+        self.fallback = fallback
+
+    def __call__(self, retry_state: Any) -> float:
+        exc = retry_state.outcome.exception()
+        response = getattr(exc, 'response', None)
+        value = response.headers.get('Retry-After') if response is not None else None
+        try:
+            return min(float(value), MAX_RETRY_AFTER)
+        except (TypeError, ValueError):
+            # Missing, or an HTTP date we do not bother to parse
+            return self.fallback(retry_state)
+
+
+def transient_retry(attempts: int = 3):
+    """
+    Retry decorator for transient network and upstream failures.
+
+    Waits with exponential backoff and full jitter, or for the Retry-After
+    the server asked for, and re-raises the last error once ``attempts``
+    calls have failed.
+    """
+    return retry(
+        stop=stop_after_attempt(attempts),
+        wait=wait_retry_after(wait_random_exponential(multiplier=0.5, max=8)),
+        retry=retry_if_exception(_is_transient),
+        reraise=True,
+    )
+
+
+@transient_retry()
+async def get_with_retry(
+    client: httpx.AsyncClient,
+    url: str,
+    bucket: Optional[TokenBucket] = None,
+    semaphore: Optional[asyncio.Semaphore] = None,
+    **kwargs: Any
+) -> httpx.Response:
+    """
+    GET a URL, raising for error statuses and retrying transient failures.
+
+    Each attempt waits for a token from ``bucket`` and then for a slot in
+    ``semaphore``, or in the URL host's shared gate if none is given.
+
+    Args:
+        client: HTTP client to send the request with
+        url: URL to fetch
+        bucket: Rate limiter to take a token from before every attempt
+        semaphore: Concurrency gate to hold while the request is in flight
+        **kwargs: Passed through to client.get
+
+    Returns:
+        httpx.Response: The successful response
+    """
+    if bucket is not None:
+        await bucket.acquire()
+    async with semaphore or host_semaphore(httpx.URL(url).host):
+        response = await client.get(url, **kwargs)
+    response.raise_for_status()
+    return response
@@ -3,20 +3,51 @@ Utility for checking a brand's web presence using Google's Programmable Search E
 """
 from typing import Dict, Any, Optional
 import os
-import requests
+import re
+from functools import lru_cache
+import httpx
 from urllib.parse import urlparse
 from dotenv import load_dotenv
 
+from utils.cache import brand_ttl_cache
+from utils.rate_limit import cse_bucket, host_bucket, host_semaphore
+from utils.retry import get_with_retry, transient_retry
+
+CSE_URL = "https://www.googleapis.com/customsearch/v1"
+GOOGLE_SEARCH_URL = "https://www.google.com/search"
+
+# Google's "About 1,230,000 results" line in the fallback search page
+_STATS_MARKER = 'id="result-stats"'
+_STATS_RE = re.compile(r'id="result-stats"[^>]*>(.*?)</div>', re.S)
+_COUNT_RE = re.compile(r'\d[\d,]*')
+
+
+@lru_cache(maxsize=1)
+def _cse_params() -> Optional[Dict[str, Any]]:
+    """Static CSE query parameters, or None if the API is not configured."""
+    api_key = os.getenv('GOOGLE_API_KEY')
+    cx = os.getenv('GOOGLE_CSE_ID')
+    if not api_key or not cx:
+        return None
+    return {
+        'key': api_key,
+        'cx': cx,
+        'num': 1,  # We only need the total results count
+        'fields': 'searchInformation/totalResults'  # ...so skip the items payload
+    }
+
 # Load environment variables
 load_dotenv()
 
 
-def check_web_presence(brand_name: str) -> Dict[str, Any]:
+@brand_ttl_cache()
+async def check_web_presence(brand_name: str, client: httpx.AsyncClient) -> Dict[str, Any]:
     """
     Check a brand's web presence using Google's Programmable Search Engine API.
     
     Args:
         brand_name: The name of the brand to check
+        client: Shared HTTP client used for the search requests
         
     Returns:
         Dictionary containing:
@@ -25,23 +56,15 @@ def check_web_presence(brand_name: str) -> Dict[str, Any]:
         - details: Dict with additional information
     """
     try:
-        api_key = os.getenv('GOOGLE_API_KEY')
-        cx = os.getenv('GOOGLE_CSE_ID')
-        
-        if not api_key or not cx:
-            return _fallback_web_check(brand_name)
+        base_params = _cse_params()
+        if base_params is None:
+            return await _fallback_web_check(brand_name, client)
             
         # Make the API request
-        url = "https://www.googleapis.com/customsearch/v1"
-        params = {
-            'q': brand_name,
-            'key': api_key,
-            'cx': cx,
-            'num': 1  # We only need the total results count
-        }
+        params = {**base_params, 'q': brand_name}
         
-        response = requests.get(url, params=params, timeout=10)
-        response.raise_for_status()
+        # Pace requests under the CSE quota and back off if it is exceeded anyway
+        response = await get_with_retry(client, CSE_URL, cse_bucket, params=params, timeout=10)
         data = response.json()
         
         # Extract the total results count
@@ -69,9 +92,9 @@ def check_web_presence(brand_name: str) -> Dict[str, Any]:
             }
         }
         
-    except requests.RequestException as e:
+    except httpx.HTTPError as e:
         # Fallback to basic search if API fails
-        return _fallback_web_check(brand_name)
+        return await _fallback_web_check(brand_name, client)
     except Exception as e:
         return {
             'score': 0,
@@ -85,7 +108,7 @@ def check_web_presence(brand_name: str) -> Dict[str, Any]:
         }
 
 
-def _fallback_web_check(brand_name: str) -> Dict[str, Any]:
+async def _fallback_web_check(brand_name: str, client: httpx.AsyncClient) -> Dict[str, Any]:
     """
     Fallback method to check web presence using basic search.
     This is used when the Google CSE API is not available.
@@ -95,18 +118,14 @@ def _fallback_web_check(brand_name: str) -> Dict[str, Any]:
         headers = {
             'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
         }
-        search_url = f"https://www.google.com/search?q={requests.utils.quote(brand_name)}"
-        
-        response = requests.get(search_url, headers=headers, timeout=10)
-        response.raise_for_status()
+        stats = await _fetch_result_stats(client, GOOGLE_SEARCH_URL, {'q': brand_name}, headers)
         
-        # Very basic check for result count in the page
-        content = response.text.lower()
-        if 'about' in content and 'results' in content:
+        if stats is not None:
             # This is a very rough estimate and may not be accurate
+            count = _COUNT_RE.search(stats)
             return {
                 'score': 50,  # Medium confidence score for fallback
-                'results_count': None,
+                'results_count': int(count.group().replace(',', '')) if count else None,
                 'details': {
                     'method': 'fallback_search',
                     'confidence': 'medium',
@@ -126,14 +145,47 @@ def _fallback_web_check(brand_name: str) -> Dict[str, Any]:
             }
         }
         
-    except Exception:
+    except Exception as e:
         return {
             'score': 0,
             'results_count': None,
             'details': {
                 'method': 'fallback_search',
+                'error': str(e),
                 'confidence': 'low',
                 'message': 'Error in fallback search',
                 'search_term': brand_name
             }
         }
+
+
+@transient_retry()
+async def _fetch_result_stats(
+    client: httpx.AsyncClient,
+    url: str,
+    params: Dict[str, str],
+    headers: Dict[str, str]
+) -> Optional[str]:
+    """
+    Stream a Google results page and return the inner HTML of its result-stats div.
+    
+    Stops reading as soon as the div has closed, so the rest of the page is
+    never downloaded or scanned. Returns None if the page has no stats.
+    """
+    await host_bucket('www.google.com').acquire()
+    async with host_semaphore('www.google.com'), \
+            client.stream('GET', url, params=params, headers=headers, timeout=10) as response:
+        response.raise_for_status()
+        page = ''
+        stats_at = -1
+        async for chunk in response.aiter_text():
+            # Only search the new text, plus enough overlap for a split marker
+            search_from = max(0, len(page) - len(_STATS_MARKER))
+            page += chunk
+            if stats_at < 0:
+                stats_at = page.find(_STATS_MARKER, search_from)
+            if stats_at >= 0:
+                match = _STATS_RE.match(page, stats_at)
+                if match:
+                    return match.group(1)
+    return None
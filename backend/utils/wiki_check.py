@@ -1,31 +1,170 @@
 """
 Utility for checking geographical entities against Wikipedia.
 """
-import wikipediaapi
-from typing import Dict, Any, Tuple, Optional
+import asyncio
+import functools
+from dataclasses import dataclass
+import hashlib
+import httpx
+import numpy as np
+import orjson
+from typing import Dict, Any, List, Tuple, Optional
 import logging
+import re
+
+from utils.cache import TTLCache
+from utils.rate_limit import TokenBucket
+from utils.redis_client import get_redis
+from utils.retry import get_with_retry
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+USER_AGENT = 'GeoScore/1.0 (your-email@example.com)'
+
+# Limits for concurrent Wikipedia lookups, under the API's advertised rates
+MAX_CONCURRENT_REQUESTS = 64
+MAX_REQUESTS_PER_SECOND = 200
+
+# TextExtracts returns intro extracts for at most 20 pages per query
+MAX_TITLES_PER_QUERY = 20
+
+# Section keywords worth 5 points each when found in a top-level heading
+IMPORTANT_SECTIONS = ('history', 'geography', 'location', 'description')
+_IMPORTANT_RE = re.compile('|'.join(IMPORTANT_SECTIONS))
+
+# Pub/sub channel on which entity names to purge from the result cache are published
+INVALIDATE_CHANNEL = 'wiki-invalidate'
+
+# Intro extract and canonical URL for the pages named in 'titles'. Only the
+# plain-text intro is transferred, never the full article. It is not cut
+# further with exsentences, since that would understate its length and
+# change which pages clear the 200 and 500 character scoring thresholds
+EXTRACT_PARAMS = {
+    'action': 'query',
+    'prop': 'extracts|info',
+    'exintro': 1,
+    'explaintext': 1,
+    'exlimit': MAX_TITLES_PER_QUERY,
+    'inprop': 'url',
+}
+
+# Process-wide client for checkers created without one, so standalone use
+# still reuses keep-alive connections
+_client: Optional[httpx.AsyncClient] = None
+
+
+def get_wiki_client() -> httpx.AsyncClient:
+    """Return the module's shared Wikipedia client, creating it on first use."""
+    global _client
+    if _client is None:
+        # No HTTP cache: api.php answers private, max-age=0 without an ETag,
+        # so stored responses could never be reused; results are cached above it
+        _client = httpx.AsyncClient(
+            http2=True,
+            limits=httpx.Limits(max_connections=50, max_keepalive_connections=50, keepalive_expiry=30),
+            timeout=10.0,
+        )
+    return _client
+
+
+async def close_wiki_client() -> None:
+    """Close the module's shared Wikipedia client if it was created."""
+    global _client
+    if _client is not None:
+        await _client.aclose()
+        _client = None
+
+@dataclass(slots=True, frozen=True)
+class WikiResult:
+    """Outcome of a Wikipedia lookup for one entity."""
+    score: int
+    url: Optional[str]
+    exists: bool
+    summary_length: int = 0
+    title: Optional[str] = None
+    error: Optional[str] = None
+    
+    def to_dict(self) -> Dict[str, Any]:
+        """The result as a score/url/details dict, as stored in score breakdowns."""
+        if self.error is not None:
+            details = {
+                'error': self.error,
+                'confidence': 'low',
+                'message': 'Error checking Wikipedia'
+            }
+        elif not self.exists:
+            details = {
+                'exists': False,
+                'confidence': 'high',
+                'message': 'No Wikipedia page found'
+            }
+        else:
+            details = {
+                'exists': True,
+                'title': self.title,
+                'summary_length': self.summary_length,
+                'confidence': 'high',
+                'method': 'wikipedia_api'
+            }
+        return {'score': self.score, 'url': self.url, 'details': details}
+
+
 class WikipediaChecker:
     """Handles Wikipedia lookups for geographical entities."""
     
-    def __init__(self, language: str = 'en'):
+    def __init__(
+        self,
+        client: Optional[httpx.AsyncClient] = None,
+        language: str = 'en',
+        cache_ttl: float = 3600,
+        cache_size: int = 10_000,
+        redis: Optional[Any] = None,
+        negative_cache_ttl: float = 21600
+    ):
         """
         Initialize the Wikipedia checker.
         
         Args:
+            client: HTTP client used for MediaWiki API requests
+                (default: the module's shared client)
             language: Language code for Wikipedia (default: 'en')
+            cache_ttl: Seconds a found page's result is reused
+            cache_size: Maximum number of cached entity results
+            redis: Redis client shared by all workers as a second cache tier
+                (default: the REDIS_URL client, if configured)
+            negative_cache_ttl: Seconds a "no page found" result is reused
         """
-        self.wiki = wikipediaapi.Wikipedia(
-            language=language,
-            extract_format=wikipediaapi.ExtractFormat.WIKI,
-            user_agent='GeoScore/1.0 (your-email@example.com)'
+        self.client = client or get_wiki_client()
+        self.api_url = f"https://{language}.wikipedia.org/w/api.php"
+        
+        # Cap in-flight and per-second requests so large batches don't trip 429s
+        self._semaphore = asyncio.Semaphore(MAX_CONCURRENT_REQUESTS)
+        self._bucket = TokenBucket(MAX_REQUESTS_PER_SECOND, MAX_REQUESTS_PER_SECOND)
+        
+        # Results keyed on entity name; pages that don't exist are cached longer
+        self.language = language
+        self.cache_ttl = cache_ttl
+        self.negative_cache_ttl = negative_cache_ttl
+        self._cache = TTLCache(cache_size, cache_ttl)
+        self._redis = redis or get_redis()
+        self.cache_stats = {'memory_hits': 0, 'redis_hits': 0, 'misses': 0}
+    
+    async def _query(self, params: Dict[str, Any]) -> Dict[str, Any]:
+        """Issue a MediaWiki API request and return the decoded JSON."""
+        # Rate limited, with 429/5xx retried after Retry-After or a jittered backoff
+        response = await get_with_retry(
+            self.client,
+            self.api_url,
+            self._bucket,
+            self._semaphore,
+            params={'format': 'json', 'formatversion': 2, 'redirects': 1, **params},
+            headers={'User-Agent': USER_AGENT}
         )
+        return orjson.loads(response.content)
     
-    def check_entity(self, entity_name: str) -> Dict[str, Any]:
+    async def check_entity(self, entity_name: str) -> WikiResult:
         """
         Check if an entity exists on Wikipedia and get a score based on content quality.
         
@@ -33,91 +172,375 @@ class WikipediaChecker:
             entity_name: Name of the entity to look up
             
         Returns:
-            Dictionary containing:
-            - score: int (0-100)
-            - url: Optional[str] - Wikipedia URL if found
-            - details: Dict with additional information
+            WikiResult with the score (0-100), the page URL if found and the
+            page details or lookup error
         """
+        cached = await self._cached_result(entity_name)
+        if cached is not None:
+            return cached
+        
         try:
-            page = self.wiki.page(entity_name)
+            data = await self._query({**EXTRACT_PARAMS, 'titles': entity_name})
+            page = data['query']['pages'][0]
+            # Sections are fetched only for a page that exists, so a miss
+            # costs a single request
+            return await self._page_result(entity_name, page)
             
-            if not page.exists():
-                return {
-                    'score': 0,
-                    'url': None,
-                    'details': {
-                        'exists': False,
-                        'confidence': 'high',
-                        'message': 'No Wikipedia page found'
-                    }
-                }
-            
-            # Calculate score based on page content
-            score = self._calculate_wiki_score(page)
-            
-            return {
-                'score': score,
-                'url': page.fullurl,
-                'details': {
-                    'exists': True,
-                    'title': page.title,
-                    'summary_length': len(page.summary) if page.summary else 0,
-                    'confidence': 'high',
-                    'method': 'wikipedia_api'
-                }
-            }
+        except Exception as e:
+            return self._error_result(entity_name, e)
+    
+    async def check_entities_batch(self, entity_names: List[str]) -> List[WikiResult]:
+        """
+        Check several entities, packing the page lookups into multi-title queries.
+        
+        Args:
+            entity_names: Names of the entities to look up
             
+        Returns:
+            List of check_entity results, in the same order as entity_names
+        """
+        results: Dict[str, WikiResult] = {}
+        misses = []
+        for name in dict.fromkeys(entity_names):
+            cached = await self._cached_result(name)
+            if cached is None:
+                misses.append(name)
+            else:
+                results[name] = cached
+        
+        chunks = [misses[i:i + MAX_TITLES_PER_QUERY] for i in range(0, len(misses), MAX_TITLES_PER_QUERY)]
+        for chunk_results in await asyncio.gather(*(self._check_chunk(chunk) for chunk in chunks)):
+            results.update(chunk_results)
+        return [results[name] for name in entity_names]
+    
+    async def _check_chunk(self, entity_names: List[str]) -> Dict[str, WikiResult]:
+        """Look up a chunk of uncached entities with a single extracts query."""
+        try:
+            data = await self._query({**EXTRACT_PARAMS, 'titles': '|'.join(entity_names)})
         except Exception as e:
-            logger.error(f"Error checking Wikipedia for {entity_name}: {str(e)}")
-            return {
-                'score': 0,
-                'url': None,
-                'details': {
-                    'error': str(e),
-                    'confidence': 'low',
-                    'message': 'Error checking Wikipedia'
-                }
-            }
+            return {name: self._error_result(name, e) for name in entity_names}
+        
+        # Follow title normalization and redirects from each requested name to its page
+        query = data['query']
+        renames = {r['from']: r['to'] for r in query.get('normalized', []) + query.get('redirects', [])}
+        pages = {page['title']: page for page in query['pages']}
+        
+        resolved = {}
+        for name in entity_names:
+            title = renames.get(name, name)
+            title = renames.get(title, title)
+            resolved[name] = pages.get(title, {'title': name, 'missing': True})
+        
+        results: Dict[str, WikiResult] = {}
+        found = []
+        for name, page in resolved.items():
+            if page.get('missing') or page.get('invalid'):
+                results[name] = await self._missing_result(name)
+            else:
+                found.append(name)
+        
+        # One sections request per page, even when several names resolve to it
+        titles = list(dict.fromkeys(resolved[name]['title'] for name in found))
+        all_sections = await asyncio.gather(
+            *(self._query_sections(title) for title in titles),
+            return_exceptions=True
+        )
+        sections_by_title = dict(zip(titles, all_sections))
+        records = []
+        for name in found:
+            sections = sections_by_title[resolved[name]['title']]
+            if isinstance(sections, Exception):
+                results[name] = self._error_result(name, sections)
+                continue
+            section_titles = _section_titles(sections)
+            records.append({
+                'name': name,
+                'summary_len': len(resolved[name].get('extract') or ''),
+                'has_sections': bool(section_titles),
+                'important_hits': _important_hits(section_titles)
+            })
+        
+        # Score every found page of the chunk in one vectorized pass
+        for record, score in zip(records, score_batch(records)):
+            name = record['name']
+            results[name] = await self._found_result(
+                name, resolved[name], record['summary_len'], int(score)
+            )
+        return {name: results[name] for name in entity_names}
+    
+    async def _cached_result(self, entity_name: str) -> Optional[WikiResult]:
+        """Result from the memory or Redis tier, or None on a miss."""
+        cached = self._cache.get(entity_name)
+        if cached is not None:
+            self.cache_stats['memory_hits'] += 1
+            return cached
+        
+        cached = await self._redis_get(entity_name)
+        if cached is not None:
+            self.cache_stats['redis_hits'] += 1
+            self._cache.set(entity_name, cached, self._ttl_for(cached))
+            return cached
+        self.cache_stats['misses'] += 1
+        return None
+    
+    async def _query_sections(self, title: str) -> Dict[str, Any]:
+        """Fetch the section list of a page, following redirects."""
+        return await self._query({
+            'action': 'parse',
+            'prop': 'sections',
+            'page': title
+        })
+    
+    async def _page_result(self, entity_name: str, page: Dict[str, Any]) -> WikiResult:
+        """
+        Score a page from an extracts query, fetching its sections if it exists.
+        
+        Args:
+            entity_name: Name the page was looked up by
+            page: Page object from the extracts query
+        """
+        if page.get('missing') or page.get('invalid'):
+            return await self._missing_result(entity_name)
+        
+        sections = await self._query_sections(page['title'])
+        section_titles = _section_titles(sections)
+        # Only the intro's length is used, so measure it once and drop the text
+        summary_length = len(page.get('extract') or '')
+        
+        # Calculate score based on page content
+        score = self._calculate_wiki_score(summary_length, section_titles)
+        return await self._found_result(entity_name, page, summary_length, score)
+    
+    async def _missing_result(self, entity_name: str) -> WikiResult:
+        """Cache and return the result for a name with no page."""
+        result = WikiResult(score=0, url=None, exists=False)
+        self._cache.set(entity_name, result, self.negative_cache_ttl)
+        await self._redis_set(entity_name, result)
+        return result
+    
+    async def _found_result(
+        self,
+        entity_name: str,
+        page: Dict[str, Any],
+        summary_length: int,
+        score: int
+    ) -> WikiResult:
+        """Cache and return the result for an existing, already scored page."""
+        result = WikiResult(
+            score=score,
+            url=page.get('fullurl'),
+            exists=True,
+            summary_length=summary_length,
+            title=page['title']
+        )
+        # Errors are never cached, so they are looked up again
+        self._cache.set(entity_name, result)
+        await self._redis_set(entity_name, result)
+        return result
+    
+    async def invalidate(self, entity_name: str) -> None:
+        """Drop an entity's cached result from memory and, if configured, Redis."""
+        self._cache.pop(entity_name)
+        if self._redis is not None:
+            await self._redis.delete(
+                self._redis_key(entity_name), self._redis_key(entity_name, negative=True)
+            )
+    
+    async def listen_for_invalidations(self) -> None:
+        """
+        Purge every entity name published on INVALIDATE_CHANNEL until cancelled.
+        
+        Returns at once when Redis is not configured. A lost connection is
+        logged and the subscription re-established after a short pause.
+        """
+        if self._redis is None:
+            return
+        while True:
+            pubsub = self._redis.pubsub()
+            try:
+                await pubsub.subscribe(INVALIDATE_CHANNEL)
+                async for message in pubsub.listen():
+                    if message['type'] != 'message':
+                        continue
+                    data = message['data']
+                    entity_name = data.decode() if isinstance(data, bytes) else data
+                    await self.invalidate(entity_name)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning(f"Wikipedia invalidation listener failed, resubscribing: {str(e)}")
+                await asyncio.sleep(1)
+            finally:
+                await pubsub.aclose()
+    
+    def _error_result(self, entity_name: str, error: Exception) -> WikiResult:
+        """Log a failed lookup and return the zero-score error result."""
+        logger.error(f"Error checking Wikipedia for {entity_name}: {str(error)}")
+        return WikiResult(score=0, url=None, exists=False, error=str(error))
+    
+    def _ttl_for(self, result: WikiResult) -> float:
+        """Cache lifetime for a result: longer for pages that don't exist."""
+        return self.cache_ttl if result.exists else self.negative_cache_ttl
+    
+    def _redis_key(self, entity_name: str, negative: bool = False) -> str:
+        """
+        Redis key for an entity's cached result.
+        
+        Negative results live under wiki:neg: so they can be flushed on their own.
+        """
+        prefix = 'wiki:neg' if negative else 'wiki'
+        return f"{prefix}:{self.language}:{hashlib.sha1(entity_name.encode()).hexdigest()}"
+    
+    async def _redis_get(self, entity_name: str) -> Optional[WikiResult]:
+        """Cached result from Redis, or None on a miss, error or no Redis."""
+        if self._redis is None:
+            return None
+        try:
+            # Found and not-found results in one round trip
+            found, missing = await self._redis.mget(
+                [self._redis_key(entity_name), self._redis_key(entity_name, negative=True)]
+            )
+        except Exception as e:
+            logger.warning(f"Redis read failed, falling back to Wikipedia: {str(e)}")
+            return None
+        raw = found or missing
+        if not raw:
+            return None
+        try:
+            return WikiResult(**orjson.loads(raw))
+        except TypeError:
+            # Written in the older nested dict format; look the page up again
+            return None
+    
+    async def _redis_set(self, entity_name: str, result: WikiResult) -> None:
+        """Share a result with other workers through Redis, ignoring failures."""
+        if self._redis is None:
+            return
+        try:
+            await self._redis.set(
+                self._redis_key(entity_name, negative=not result.exists),
+                orjson.dumps(result),
+                ex=int(self._ttl_for(result))
+            )
+        except Exception as e:
+            logger.warning(f"Redis write failed: {str(e)}")
+    
+    async def check_entities(self, entity_names: List[str]) -> List[WikiResult]:
+        """
+        Check several entities; an alias of check_entities_batch.
+        
+        Args:
+            entity_names: Names of the entities to look up
+            
+        Returns:
+            List of check_entity results, in the same order as entity_names
+        """
+        return await self.check_entities_batch(entity_names)
     
-    def _calculate_wiki_score(self, page) -> int:
+    def _calculate_wiki_score(self, summary_length: int, section_titles: List[str]) -> int:
         """
         Calculate a score based on Wikipedia page quality.
         
         Args:
-            page: Wikipedia page object
+            summary_length: Length of the plain-text intro of an existing page
+            section_titles: Titles of the page's top-level sections
             
         Returns:
             int: Score from 0-100
         """
-        score = 0
+        # One-page batch, so the formula lives only in score_pages
+        return int(score_pages(
+            np.array([summary_length], dtype=np.int32),
+            np.array([bool(section_titles)]),
+            np.array([_important_hits(section_titles)], dtype=np.int8)
+        )[0])
+
+
+def _section_titles(sections: Dict[str, Any]) -> List[str]:
+    """Top-level section headings from a parse response."""
+    return [s['line'] for s in sections['parse']['sections'] if s.get('toclevel') == 1]
+
+
+def _important_hits(section_titles: List[str]) -> int:
+    """Number of distinct important keywords found in the section titles."""
+    # All titles in one lowercase string; a keyword found in it is found
+    # in some title, since no keyword spans the newline separator. One regex
+    # pass finds every keyword, and the set counts each keyword once
+    titles = '\n'.join(section_titles).lower()
+    return len(set(_IMPORTANT_RE.findall(titles)))
+
+
+def score_pages(
+    summary_lengths: np.ndarray,
+    has_sections: np.ndarray,
+    important_hits: np.ndarray
+) -> np.ndarray:
+    """
+    Score pages from parallel per-page arrays.
+    
+    Args:
+        summary_lengths: Intro lengths (int32)
+        has_sections: Whether each page has top-level sections (bool)
+        important_hits: Distinct important keywords in each page's headings (int8)
         
-        # Basic existence gives points
-        if page.exists():
-            score = 50
-            
-            # Add points for page content
-            if page.summary:
-                score += 20
-                
-                # More detailed content
-                if len(page.summary) > 500:
-                    score += 15
-                elif len(page.summary) > 200:
-                    score += 10
-                    
-            # Check for important sections
-            if page.sections:
-                score += 15
-                
-                # Check for specific important sections
-                section_titles = [s.title.lower() for s in page.sections]
-                important_sections = ['history', 'geography', 'location', 'description']
-                
-                for section in important_sections:
-                    if any(section in title for title in section_titles):
-                        score += 5
-            
-            # Cap the score at 100
-            score = min(score, 100)
-            
-        return score
+    Returns:
+        np.ndarray: int32 scores from 0-100
+    """
+    slen = summary_lengths
+    score = (
+        50                                                          # page exists
+        + 20 * (slen > 0)                                           # has an intro
+        + 15 * (slen > 500) + 10 * ((slen > 200) & (slen <= 500))   # intro length
+        + 15 * has_sections                                         # has sections
+        + 5 * important_hits
+    ).astype(np.int32)
+    # Cap the score at 100
+    np.minimum(score, 100, out=score)
+    return score
+
+
+def score_batch(records: List[Dict[str, Any]]) -> np.ndarray:
+    """
+    Score many existing pages at once.
+    
+    Args:
+        records: Dicts with 'summary_len', 'has_sections' and 'important_hits'
+        
+    Returns:
+        np.ndarray: int32 scores in the order of records
+    """
+    count = len(records)
+    slen = np.fromiter((r['summary_len'] for r in records), dtype=np.int32, count=count)
+    has_sec = np.fromiter((r['has_sections'] for r in records), dtype=np.bool_, count=count)
+    imp = np.fromiter((r['important_hits'] for r in records), dtype=np.int8, count=count)
+    return score_pages(slen, has_sec, imp)
+
+
+@functools.lru_cache(maxsize=8)
+def _checker_for(language: str) -> WikipediaChecker:
+    return WikipediaChecker(language=language)
+
+
+def get_checker(language: str = 'en') -> WikipediaChecker:
+    """Return the process-wide checker for a language, so its caches and limits are shared."""
+    # Call through with a positional key so get_checker() and get_checker('en') match
+    return _checker_for(language)
+
+
+async def check_wikipedia_presence(entity_name: str, language: str = 'en') -> Dict[str, Any]:
+    """
+    Check an entity's Wikipedia presence with the shared checker for the language.
+    
+    Not wrapped in functools.lru_cache: on a coroutine function it would cache
+    the coroutine, which can only be awaited once. Repeat lookups are instead
+    served from the shared checker's result cache, which skips error results
+    and expires entries.
+    
+    Args:
+        entity_name: Name of the entity to look up
+        language: Language code for Wikipedia (default: 'en')
+        
+    Returns:
+        The WikipediaChecker.check_entity result as a dict
+    """
+    return (await get_checker(language).check_entity(entity_name)).to_dict()